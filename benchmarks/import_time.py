@@ -0,0 +1,72 @@
+"""
+Measures the cold import time of the modules loaded at Streamlit start.
+
+Every module is imported in a fresh interpreter so the numbers match a new
+Streamlit process or container cold start. The script fails when a module
+exceeds its budget or when it pulls in the heavy PDF/rasterization stack.
+
+Usage:
+    python benchmarks/import_time.py [--repeat 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Import-time budget in seconds per module (including pandas/numpy/plotly core)
+IMPORT_BUDGET_S = {
+    'data_loader': 1.0,
+    'analyzer': 1.0,
+    'visualizer': 1.2,
+    'reporter': 0.1,
+    'exporter': 0.1,
+}
+
+# Modules that must only be loaded on first use
+LAZY_MODULES = ['weasyprint', 'jinja2', 'kaleido', 'plotly.express', 'openpyxl']
+
+MEASURE_SCRIPT = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+def measure_import(module, repeat=3):
+    """
+    Returns the best import time of a module in a fresh interpreter and the lazy modules it loaded.
+    """
+    best = None
+    loaded = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', MEASURE_SCRIPT.format(module=module, lazy=LAZY_MODULES)],
+            cwd=SRC_DIR, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        best = result['seconds'] if best is None else min(best, result['seconds'])
+        loaded = result['loaded']
+    return best, loaded
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help='Number of cold imports per module (best is reported).')
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'Module':<15}{'Import (s)':>12}{'Budget (s)':>12}  Eager heavy modules")
+    for module, budget in IMPORT_BUDGET_S.items():
+        seconds, loaded = measure_import(module, args.repeat)
+        over_budget = seconds > budget
+        failed = failed or over_budget or bool(loaded)
+        status = 'FAIL' if over_budget or loaded else 'ok'
+        print(f"{module:<15}{seconds:>12.3f}{budget:>12.2f}  {', '.join(loaded) or '-'}  {status}")
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
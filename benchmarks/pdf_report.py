@@ -0,0 +1,109 @@
+"""
+Measures PDF report size and render time for PNG and SVG chart embedding.
+
+Builds one simulated year with the same figures as the dashboard and renders
+the report in both chart formats (optionally with the full hourly appendix).
+Requires WeasyPrint and Kaleido (with Chrome) to be installed.
+
+Usage:
+    python benchmarks/pdf_report.py [--appendix] [--json results.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+# Target reduction of the PDF size with SVG charts
+TARGET_SIZE_RATIO = 2.0
+
+# Columns of the hourly appendix
+APPENDIX_COLUMNS = {
+    'datetime': 'Datum a čas',
+    'consumption_kWh': 'Spotřeba',
+    'production_kWh': 'Výroba',
+    'grid_import_kWh': 'Nákup ze sítě',
+    'grid_export_kWh': 'Prodej do sítě',
+    'battery_charge_kWh': 'Nabíjení baterie',
+    'battery_discharge_kWh': 'Vybíjení baterie',
+    'battery_soc_kWh': 'Stav baterie'
+}
+
+def build_report_inputs(kwp=10.0, battery_capacity=10.0, annual_consumption_kwh=5000.0, price_buy=5.0, price_sell=2.0):
+    """
+    Prepares the arguments of generate_pdf_report for one simulated year.
+    """
+    import numpy as np
+    from data_loader import load_consumption_data, load_production_data
+    from analyzer import calculate_energy_balance, calculate_financials, calculate_investment_comparison
+    from visualizer import (plot_energy_balance_daily, plot_monthly_stats, plot_investment_comparison,
+                            plot_savings_treemap, plot_savings_composition, plot_energy_treemap)
+
+    np.random.seed(42)
+    result_df = calculate_energy_balance(load_consumption_data(target_annual_kwh=annual_consumption_kwh),
+                                         load_production_data(kwp=kwp), battery_capacity_kwh=battery_capacity)
+    financials = calculate_financials(result_df, electricity_price_buy=price_buy, electricity_price_sell=price_sell)
+    inv_df = calculate_investment_comparison(350000.0, financials['savings_czk'])
+
+    self_consumption = result_df['production_kWh'].sum() - financials['total_export_kWh']
+    figures = {
+        'savings_pie': plot_savings_composition(self_consumption * price_buy, financials['total_export_kWh'] * price_sell),
+        'savings_treemap': plot_savings_treemap(result_df, price_buy, price_sell),
+        'energy_pie': plot_savings_composition(self_consumption, financials['total_export_kWh'], labels=['Vlastní spotřeba', 'Export do sítě'], unit="kWh"),
+        'energy_treemap': plot_energy_treemap(result_df),
+        'monthly_stats': plot_monthly_stats(result_df),
+        'daily_chart': plot_energy_balance_daily(result_df, result_df['datetime'].dt.date.iloc[4000]),
+        'investment_chart': plot_investment_comparison(inv_df)
+    }
+
+    energy_data = {
+        'total_consumption_kwh': result_df['consumption_kWh'].sum(),
+        'total_production_kwh': result_df['production_kWh'].sum(),
+        'self_consumption_kwh': self_consumption,
+        'total_import_kwh': financials['total_import_kWh'],
+        'total_export_kwh': financials['total_export_kWh']
+    }
+    investment_data = {
+        'investment_cost': 350000.0,
+        'final_pv_gain': inv_df['PV_Cumulative_CashFlow'].iloc[-1],
+        'final_sp500_net': inv_df['SP500_Net_Result'].iloc[-1]
+    }
+    dataframes = {'energy_data': result_df.head(20), 'investment_data': inv_df}
+
+    return (financials, energy_data, investment_data, {}, figures, dataframes), result_df
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--appendix', action='store_true', help='Include the full hourly appendix.')
+    parser.add_argument('--json', help='Write the results to this JSON file.')
+    args = parser.parse_args()
+
+    from reporter import generate_pdf_report
+
+    report_args, result_df = build_report_inputs()
+    results = {}
+    for chart_format in ['png', 'svg']:
+        start = time.perf_counter()
+        pdf_bytes = generate_pdf_report(*report_args, chart_format=chart_format,
+                                        appendix_df=result_df if args.appendix else None,
+                                        appendix_columns=APPENDIX_COLUMNS)
+        results[chart_format] = {'seconds': time.perf_counter() - start, 'bytes': len(pdf_bytes)}
+
+    size_ratio = results['png']['bytes'] / results['svg']['bytes']
+    results['size_ratio'] = size_ratio
+
+    print(f"{'Format':<8}{'Size (kB)':>12}{'Render (s)':>12}")
+    for chart_format in ['png', 'svg']:
+        print(f"{chart_format:<8}{results[chart_format]['bytes'] / 1024:>12.1f}{results[chart_format]['seconds']:>12.2f}")
+    print(f"PNG/SVG size ratio: {size_ratio:.2f} (target >= {TARGET_SIZE_RATIO:.1f})")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    return 0 if size_ratio >= TARGET_SIZE_RATIO else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,67 +1,182 @@
 import pandas as pd
+import numpy as np
 
-def calculate_energy_balance(consumption_df, production_df, battery_capacity_kwh=10.0):
+# Controllable loads that can absorb PV surplus before it is exported.
+# window = (start_hour, end_hour) of the day when the load may run. A window with
+# end_hour < start_hour crosses midnight (e.g. (20, 6) for overnight EV charging),
+# the daily energy need then applies to the window starting in the evening.
+FLEXIBLE_LOAD_PRESETS = {
+    'water_heater': {'label': 'Ohřev vody (TUV)', 'power_kw': 2.0, 'daily_kwh': 6.0, 'window': (0, 24)},
+    'heat_pump': {'label': 'Tepelné čerpadlo', 'power_kw': 3.0, 'daily_kwh': 10.0, 'window': (0, 24)},
+    'ev': {'label': 'Elektromobil', 'power_kw': 7.4, 'daily_kwh': 8.0, 'window': (8, 20)}
+}
+
+def make_flexible_load(kind, **overrides):
+    """
+    Creates a controllable load definition from a preset.
+    Any preset value (label, power_kw, daily_kwh, window) can be overridden.
+    """
+    if kind not in FLEXIBLE_LOAD_PRESETS:
+        raise ValueError(f"Unknown flexible load '{kind}', expected one of {list(FLEXIBLE_LOAD_PRESETS)}.")
+    load = {'id': kind, **FLEXIBLE_LOAD_PRESETS[kind], **overrides}
+
+    start_hour, end_hour = load['window']
+    if not (0 <= start_hour <= 24 and 0 <= end_hour <= 24) or start_hour == end_hour:
+        raise ValueError(f"Invalid time window {load['window']} for flexible load '{kind}'.")
+    return load
+
+def _prepare_flexible_loads(flexible_loads, datetimes):
+    """
+    Precomputes per-interval arrays of the controllable loads for the dispatch loop.
+    """
+    datetimes = pd.DatetimeIndex(datetimes)
+    if len(datetimes) > 1:
+        interval_h = pd.Series(datetimes).diff().median().total_seconds() / 3600
+    else:
+        interval_h = 1.0
+
+    hour = datetimes.hour.to_numpy() + datetimes.minute.to_numpy() / 60
+
+    prepared = []
+    for load in flexible_loads:
+        start_hour, end_hour = load['window']
+        if start_hour < end_hour:
+            in_window = (hour >= start_hour) & (hour < end_hour)
+        else:
+            # Window crossing midnight
+            in_window = (hour >= start_hour) | (hour < end_hour)
+        max_energy = load['power_kw'] * interval_h
+
+        # The daily need applies to a "day" starting at the window start, so a window
+        # crossing midnight is one continuous day of the load
+        day = (datetimes - pd.Timedelta(hours=start_hour)).normalize().to_numpy()
+
+        # Energy the load can still take in the window after each interval (same day)
+        window_energy = pd.Series(np.where(in_window, max_energy, 0.0))
+        day_total = window_energy.groupby(day).transform('sum').to_numpy()
+        day_cumulative = window_energy.groupby(day).cumsum().to_numpy()
+
+        prepared.append({
+            'id': load['id'],
+            'daily_kwh': load['daily_kwh'],
+            'max_energy': max_energy,
+            'in_window': in_window,
+            'day_start': np.r_[True, day[1:] != day[:-1]],
+            'future_capacity': day_total - day_cumulative
+        })
+
+    return prepared
+
+def _dispatch_battery(consumption, production, battery_capacity_kwh=10.0, flexible_loads=None, datetimes=None):
+    """
+    Simple self-consumption battery dispatch over a (sites x intervals) matrix.
+    The loop runs over intervals only, all sites are processed at once.
+    Surplus left after charging the battery is diverted to the flexible loads
+    before it is exported. A load that would miss its daily energy need by the
+    end of its window is topped up from the battery first and then from the grid.
+    Returns a dict of (sites x intervals) arrays.
+    """
+    consumption = np.atleast_2d(np.asarray(consumption, dtype=float))
+    production = np.atleast_2d(np.asarray(production, dtype=float))
+    n_sites, n_intervals = consumption.shape
+
+    # Battery capacity can be a scalar or one value per site
+    capacity = np.broadcast_to(np.asarray(battery_capacity_kwh, dtype=float), (n_sites,))
+
+    surplus = production - consumption
+    excess = np.maximum(surplus, 0.0)
+    deficit = np.maximum(-surplus, 0.0)
+
+    battery_charge = np.zeros((n_sites, n_intervals))
+    battery_discharge = np.zeros((n_sites, n_intervals))
+    battery_soc = np.zeros((n_sites, n_intervals))
+
+    loads = _prepare_flexible_loads(flexible_loads, datetimes) if flexible_loads else []
+    load_solar = np.zeros((len(loads), n_sites, n_intervals))
+    load_battery = np.zeros((len(loads), n_sites, n_intervals))
+    load_grid = np.zeros((len(loads), n_sites, n_intervals))
+    delivered = np.zeros((len(loads), n_sites)) # Energy delivered to each load today
+    topup = np.zeros((len(loads), n_sites))
+
+    soc = np.zeros(n_sites) # State of Charge in kWh
+    for t in range(n_intervals):
+        # Production > Consumption -> charge
+        charge = np.minimum(excess[:, t], capacity - soc)
+
+        # Surplus left after charging goes to the loads, a load that would miss its
+        # daily need by the end of its window requires a top-up
+        remaining = excess[:, t] - charge
+        topup[:] = 0.0
+        for k, load in enumerate(loads):
+            if load['day_start'][t]:
+                delivered[k] = 0.0
+            if not load['in_window'][t]:
+                continue
+            need = load['daily_kwh'] - delivered[k]
+
+            solar = np.clip(np.minimum(remaining, need), 0.0, load['max_energy'])
+            remaining = remaining - solar
+            topup[k] = np.clip(need - solar - load['future_capacity'][t], 0.0, load['max_energy'] - solar)
+
+            delivered[k] += solar + topup[k]
+            load_solar[k, :, t] = solar
+
+        # Consumption > Production -> discharge, the battery covers the house first, then the top-ups
+        discharge = np.minimum(deficit[:, t] + topup.sum(axis=0), soc)
+        soc = soc + charge - discharge
+
+        battery_charge[:, t] = charge
+        battery_discharge[:, t] = discharge
+        battery_soc[:, t] = soc
+
+        if loads:
+            available = discharge - np.minimum(deficit[:, t], discharge)
+            for k in range(len(loads)):
+                from_battery = np.minimum(topup[k], available)
+                available = available - from_battery
+                load_battery[k, :, t] = from_battery
+                load_grid[k, :, t] = topup[k] - from_battery
+
+    flows = {
+        'grid_import_kWh': deficit - battery_discharge + load_battery.sum(axis=0) + load_grid.sum(axis=0),
+        'grid_export_kWh': excess - battery_charge - load_solar.sum(axis=0),
+        'battery_charge_kWh': battery_charge,
+        'battery_discharge_kWh': battery_discharge,
+        'battery_soc_kWh': battery_soc
+    }
+
+    if loads:
+        for k, load in enumerate(loads):
+            flows[f"flex_{load['id']}_solar_kWh"] = load_solar[k]
+            flows[f"flex_{load['id']}_battery_kWh"] = load_battery[k]
+            flows[f"flex_{load['id']}_grid_kWh"] = load_grid[k]
+        flows['flexible_load_kWh'] = load_solar.sum(axis=0) + load_battery.sum(axis=0) + load_grid.sum(axis=0)
+
+    return flows
+
+def calculate_energy_balance(consumption_df, production_df, battery_capacity_kwh=10.0, flexible_loads=None):
     """
     Calculates the energy balance including self-consumption, grid feed-in, and battery usage.
+    Optional flexible loads (see make_flexible_load) absorb surplus before export.
     """
     df = pd.merge(consumption_df, production_df, on='datetime')
     
-    battery_soc = 0.0 # State of Charge in kWh
-    battery_soc_history = []
-    
-    grid_import = []
-    grid_export = []
-    battery_charge = []
-    battery_discharge = []
-    
-    for i, row in df.iterrows():
-        prod = row['production_kWh']
-        cons = row['consumption_kWh']
-        
-        surplus = prod - cons
-        
-        if surplus > 0:
-            # Production > Consumption
-            # Charge battery
-            charge_potential = surplus
-            charge_actual = min(charge_potential, battery_capacity_kwh - battery_soc)
-            battery_soc += charge_actual
-            
-            # Export rest to grid
-            export_actual = surplus - charge_actual
-            
-            grid_import.append(0.0)
-            grid_export.append(export_actual)
-            battery_charge.append(charge_actual)
-            battery_discharge.append(0.0)
-            
-        else:
-            # Consumption > Production
-            deficit = cons - prod
-            
-            # Discharge battery
-            discharge_potential = deficit
-            discharge_actual = min(discharge_potential, battery_soc)
-            battery_soc -= discharge_actual
-            
-            # Import rest from grid
-            import_actual = deficit - discharge_actual
-            
-            grid_import.append(import_actual)
-            grid_export.append(0.0)
-            battery_charge.append(0.0)
-            battery_discharge.append(discharge_actual)
-            
-        battery_soc_history.append(battery_soc)
-        
-    df['grid_import_kWh'] = grid_import
-    df['grid_export_kWh'] = grid_export
-    df['battery_charge_kWh'] = battery_charge
-    df['battery_discharge_kWh'] = battery_discharge
-    df['battery_soc_kWh'] = battery_soc_history
+    flows = _dispatch_battery(df['consumption_kWh'].to_numpy(), df['production_kWh'].to_numpy(), battery_capacity_kwh,
+                              flexible_loads=flexible_loads, datetimes=df['datetime'])
+    for column, values in flows.items():
+        df[column] = values[0]
     
     return df
 
+def get_total_consumption(df):
+    """
+    Returns the total consumption including the energy of flexible loads.
+    """
+    total = df['consumption_kWh'].sum()
+    if 'flexible_load_kWh' in df:
+        total += df['flexible_load_kWh'].sum()
+    return total
+
 def calculate_financials(df, electricity_price_buy=5.0, electricity_price_sell=2.0):
     """
     Calculates financial metrics based on energy flows.
@@ -70,7 +185,8 @@ def calculate_financials(df, electricity_price_buy=5.0, electricity_price_sell=2
     total_import = df['grid_import_kWh'].sum()
     total_export = df['grid_export_kWh'].sum()
     
-    cost_without_pv = df['consumption_kWh'].sum() * electricity_price_buy
+    # Flexible loads would be supplied from the grid without PV as well
+    cost_without_pv = get_total_consumption(df) * electricity_price_buy
     cost_with_pv = (total_import * electricity_price_buy) - (total_export * electricity_price_sell)
     
     savings = cost_without_pv - cost_with_pv
@@ -1,10 +1,16 @@
 import streamlit as st
 import pandas as pd
 import datetime
-from data_loader import load_consumption_data, load_production_data
-from analyzer import calculate_energy_balance, calculate_financials, calculate_investment_comparison
-from visualizer import plot_energy_balance_daily, plot_monthly_stats, plot_investment_comparison, plot_savings_treemap, plot_savings_composition, plot_energy_treemap
-from reporter import generate_pdf_report
+import os
+from billing import BILLING_PRODUCTS, BREAKER_MONTHLY_CHARGES_CZK, compare_billing_products, compare_billing_scenarios, make_billing_product
+from data_loader import load_consumption_data, load_production_data, load_production_years
+from analyzer import calculate_energy_balance, calculate_financials, calculate_investment_comparison, get_total_consumption, make_flexible_load, FLEXIBLE_LOAD_PRESETS
+from ensemble import run_weather_ensemble
+from exporter import EXPORT_FORMATS, export_to_bytes
+from representative_days import compare_with_full_year
+from scenario_store import MAX_COMPARED_SCENARIOS, ScenarioStore
+from sensitivity import SensitivityEngine, SENSITIVITY_PARAMETERS, SENSITIVITY_METRICS, payback_period
+from visualizer import plot_energy_balance_daily, plot_monthly_stats, plot_investment_comparison, plot_savings_treemap, plot_savings_composition, plot_energy_treemap, plot_tornado, plot_spider, plot_weather_ensemble, plot_billing_monthly, plot_scenario_monthly, plot_scenario_investment
 
 def format_cz_number(val):
     """Formats a number to Czech standard: 1 234,56"""
@@ -12,43 +18,175 @@ def format_cz_number(val):
         return "{:,.2f}".format(val).replace(",", " ").replace(".", ",")
     return val
 
+def format_payback(payback_years, horizon_years):
+    """Formats the interpolated payback period, e.g. 11,4 or > 20 when it is beyond the horizon."""
+    if pd.isna(payback_years):
+        return f"> {horizon_years}"
+    return f"{payback_years:.1f}".replace(".", ",")
+
 st.set_page_config(page_title="fveAnalyzator - FVE Analýza", layout="wide")
 
 
+@st.cache_resource
+def start_pdf_renderer_warmup():
+    """Loads the PDF stack in the background once per server process."""
+    from reporter import warmup_renderer
+    return warmup_renderer()
+
+
+# Default values of the energy balance inputs, keyed by the session state keys of their widgets
+SCENARIO_INPUT_DEFAULTS = {
+    'kwp': 10.0,
+    'battery_capacity': 10.0,
+    'annual_consumption_mwh': 5.0,
+    'price_power': 3.0,
+    'price_distribution': 2.0,
+    'price_sell': 2.0
+}
+for kind, preset in FLEXIBLE_LOAD_PRESETS.items():
+    SCENARIO_INPUT_DEFAULTS[f'flex_{kind}'] = False
+    SCENARIO_INPUT_DEFAULTS[f'flex_{kind}_power_kw'] = preset['power_kw']
+    SCENARIO_INPUT_DEFAULTS[f'flex_{kind}_daily_kwh'] = preset['daily_kwh']
+    SCENARIO_INPUT_DEFAULTS[f'flex_{kind}_start'] = preset['window'][0]
+    SCENARIO_INPUT_DEFAULTS[f'flex_{kind}_end'] = preset['window'][1]
+
+# Default inputs of the investment comparison, the current values are kept in session state
+INVESTMENT_INPUT_DEFAULTS = {
+    'investment_cost': 350000.0,
+    'years': 20,
+    'sp500_return_pct': 8.0,
+    'inflation_pct': 3.0
+}
+
+
+@st.cache_resource
+def get_scenario_store():
+    """Opens the scenario store once per server process."""
+    return ScenarioStore()
+
+
+def render_scenario_loader(store):
+    """Loads the inputs of a saved scenario into the sidebar widgets."""
+    scenarios = store.list_scenarios()
+    if scenarios.empty:
+        return
+
+    st.sidebar.header("Uložené scénáře")
+    name = st.sidebar.selectbox("Scénář", scenarios['name'], key='scenario_to_load')
+    if st.sidebar.button("Načíst scénář"):
+        scenario = scenarios.loc[scenarios['name'] == name].iloc[0]
+        inputs = scenario['inputs']
+        st.session_state['investment_inputs'] = scenario['investment'] or dict(INVESTMENT_INPUT_DEFAULTS)
+        for key in ('kwp', 'battery_capacity', 'annual_consumption_mwh', 'price_power', 'price_distribution', 'price_sell'):
+            st.session_state[key] = inputs[key]
+
+        loads = {load['id']: load for load in inputs['flexible_loads']}
+        for kind in FLEXIBLE_LOAD_PRESETS:
+            st.session_state[f'flex_{kind}'] = kind in loads
+            if kind in loads:
+                st.session_state[f'flex_{kind}_power_kw'] = loads[kind]['power_kw']
+                st.session_state[f'flex_{kind}_daily_kwh'] = loads[kind]['daily_kwh']
+                st.session_state[f'flex_{kind}_start'], st.session_state[f'flex_{kind}_end'] = loads[kind]['window']
+
+
+def render_scenario_saver(store, scenario_inputs, result_df, metrics):
+    """Saves the current inputs, investment inputs and results under a name."""
+    st.sidebar.markdown("---")
+    st.sidebar.header("Uložit scénář")
+    investment_inputs = st.session_state.get('investment_inputs', INVESTMENT_INPUT_DEFAULTS)
+    st.sidebar.caption(f"Investice {format_cz_number(investment_inputs['investment_cost'])} Kč, "
+                       f"horizont {investment_inputs['years']} let (stránka 'Ekonomika - Investice').")
+    name = st.sidebar.text_input("Název scénáře").strip()
+    if st.sidebar.button("Uložit scénář", disabled=not name):
+        store.save(name, scenario_inputs, result_df, metrics, investment=investment_inputs)
+        st.sidebar.success(f"Scénář '{name}' uložen.")
+
+
 def render_energy_dashboard():
     st.title("🔋 fveAnalyzator - Energetická Bilance")
+    start_pdf_renderer_warmup()
+
+    store = get_scenario_store()
+    render_scenario_loader(store)
+
+    # Sidebar for inputs (values live in session state, so a saved scenario can be loaded into them)
+    for key, value in SCENARIO_INPUT_DEFAULTS.items():
+        st.session_state.setdefault(key, value)
 
-    # Sidebar for inputs
     st.sidebar.header("Parametry FVE")
-    kwp = st.sidebar.slider("Výkon FVE (kWp)", min_value=1.0, max_value=50.0, value=10.0, step=0.5)
-    battery_capacity = st.sidebar.slider("Kapacita Baterie (kWh)", min_value=0.0, max_value=50.0, value=10.0, step=0.5)
+    kwp = st.sidebar.slider("Výkon FVE (kWp)", min_value=1.0, max_value=50.0, step=0.5, key='kwp')
+    battery_capacity = st.sidebar.slider("Kapacita Baterie (kWh)", min_value=0.0, max_value=50.0, step=0.5, key='battery_capacity')
 
     st.sidebar.header("Spotřeba")
-    annual_consumption_mwh = st.sidebar.number_input("Roční spotřeba (MWh)", value=5.0, step=0.1)
+    annual_consumption_mwh = st.sidebar.number_input("Roční spotřeba (MWh)", step=0.1, key='annual_consumption_mwh')
     annual_consumption_kwh = annual_consumption_mwh * 1000
 
     st.sidebar.header("Ceny Energie (CZK/kWh)")
-    price_power = st.sidebar.number_input("Cena silové elektřiny", value=3.0)
-    price_distribution = st.sidebar.number_input("Cena distribuce", value=2.0)
+    price_power = st.sidebar.number_input("Cena silové elektřiny", key='price_power')
+    price_distribution = st.sidebar.number_input("Cena distribuce", key='price_distribution')
     price_buy = price_power + price_distribution
     st.sidebar.info(f"Celková nákupní cena: {format_cz_number(price_buy)} Kč/kWh")
     
-    price_sell = st.sidebar.number_input("Výkupní cena", value=2.0)
+    price_sell = st.sidebar.number_input("Výkupní cena", key='price_sell')
+
+    st.sidebar.header("Řízené spotřebiče")
+    flexible_loads = []
+    for kind, preset in FLEXIBLE_LOAD_PRESETS.items():
+        if st.sidebar.checkbox(preset['label'], key=f'flex_{kind}'):
+            power_kw = st.sidebar.number_input(f"{preset['label']} - příkon (kW)", min_value=0.1, step=0.1, key=f'flex_{kind}_power_kw')
+            daily_kwh = st.sidebar.number_input(f"{preset['label']} - denní potřeba (kWh)", min_value=0.0, step=0.5, key=f'flex_{kind}_daily_kwh')
+            start_hour = st.sidebar.slider(f"{preset['label']} - začátek okna (h)", 0, 24, key=f'flex_{kind}_start')
+            end_hour = st.sidebar.slider(f"{preset['label']} - konec okna (h)", 0, 24, key=f'flex_{kind}_end',
+                                         help="Konec před začátkem znamená okno přes půlnoc (např. nabíjení 20-6 h).")
+            if start_hour == end_hour:
+                st.sidebar.error(f"{preset['label']}: časové okno musí mít alespoň 1 hodinu, spotřebič není zahrnut.")
+                continue
+            window = (start_hour, end_hour)
+            flexible_loads.append(make_flexible_load(kind, power_kw=power_kw, daily_kwh=daily_kwh, window=window))
+
+    scenario_inputs = {
+        'kwp': kwp,
+        'battery_capacity': battery_capacity,
+        'annual_consumption_mwh': annual_consumption_mwh,
+        'price_power': price_power,
+        'price_distribution': price_distribution,
+        'price_sell': price_sell,
+        'flexible_loads': flexible_loads
+    }
 
     # Load Data
     with st.spinner('Načítám a počítám data...'):
-        consumption_df = load_consumption_data(target_annual_kwh=annual_consumption_kwh)
-        production_df = load_production_data(kwp=kwp)
-        
-        # Analysis
-        result_df = calculate_energy_balance(consumption_df, production_df, battery_capacity_kwh=battery_capacity)
+        # Identical inputs reuse the stored results instead of a new simulation
+        stored_scenario = store.find_by_inputs(scenario_inputs)
+        if stored_scenario is not None:
+            result_df = stored_scenario['result_df']
+            consumption_df = result_df[['datetime', 'consumption_kWh']]
+            production_df = result_df[['datetime', 'production_kWh']]
+            st.sidebar.success(f"Výsledky načteny z uloženého scénáře '{stored_scenario['name']}'.")
+        else:
+            consumption_df = load_consumption_data(target_annual_kwh=annual_consumption_kwh)
+            production_df = load_production_data(kwp=kwp)
+
+            # Analysis
+            result_df = calculate_energy_balance(consumption_df, production_df, battery_capacity_kwh=battery_capacity, flexible_loads=flexible_loads)
         financials = calculate_financials(result_df, electricity_price_buy=price_buy, electricity_price_sell=price_sell)
 
         # Save savings to session state for the other page
         st.session_state['annual_savings'] = financials['savings_czk']
+        # Inputs and profiles of the base case for the sensitivity analysis
+        st.session_state['energy_inputs'] = {
+            'kwp': kwp,
+            'battery_capacity': battery_capacity,
+            'price_power': price_power,
+            'price_distribution': price_distribution,
+            'price_sell': price_sell,
+            'flexible_loads': flexible_loads,
+            'consumption_df': consumption_df,
+            'production_df': production_df
+        }
         
         # Calculate Metrics
-        total_consumption = result_df['consumption_kWh'].sum()
+        total_consumption = get_total_consumption(result_df)
         total_production = result_df['production_kWh'].sum()
         self_consumption = total_production - financials['total_export_kWh']
         
@@ -123,6 +261,9 @@ def render_energy_dashboard():
     fig_monthly_stats = plot_monthly_stats(result_df)
     st.plotly_chart(fig_monthly_stats, use_container_width=True)
 
+    render_billing_comparison(result_df, consumption_df, production_df, battery_capacity, flexible_loads,
+                              price_power, price_distribution, price_sell)
+
     st.subheader("Data")
     
     # Translate and Format Data Table
@@ -139,8 +280,13 @@ def render_energy_dashboard():
         'grid_export_kWh': 'Prodej do sítě',
         'battery_charge_kWh': 'Nabíjení baterie',
         'battery_discharge_kWh': 'Vybíjení baterie',
-        'battery_soc_kWh': 'Stav baterie'
+        'battery_soc_kWh': 'Stav baterie',
+        'flexible_load_kWh': 'Řízené spotřebiče'
     }
+    for load in flexible_loads:
+        column_mapping[f"flex_{load['id']}_solar_kWh"] = f"{load['label']} - přebytky"
+        column_mapping[f"flex_{load['id']}_battery_kWh"] = f"{load['label']} - z baterie"
+        column_mapping[f"flex_{load['id']}_grid_kWh"] = f"{load['label']} - ze sítě"
     display_df = display_df.rename(columns=column_mapping)
     
     # Format numbers with kWh
@@ -153,10 +299,27 @@ def render_energy_dashboard():
     st.subheader("Detailní Denní Průběh")
     selected_date = st.date_input("Vyberte den", datetime.date(2024, 6, 15))
     st.plotly_chart(plot_energy_balance_daily(result_df, selected_date), use_container_width=True)
+
+    st.markdown("---")
+    weather_ensemble = render_weather_ensemble(consumption_df, annual_consumption_kwh, kwp, battery_capacity, price_buy, price_sell, flexible_loads)
     
     # PDF Report Generation
+    render_scenario_saver(store, scenario_inputs, result_df, {
+        'savings_czk': financials['savings_czk'],
+        'cost_without_pv_czk': financials['cost_without_pv_czk'],
+        'cost_with_pv_czk': financials['cost_with_pv_czk'],
+        'consumption_kWh': total_consumption,
+        'production_kWh': total_production,
+        'grid_import_kWh': financials['total_import_kWh'],
+        'grid_export_kWh': financials['total_export_kWh'],
+        'self_consumption_kWh': self_consumption
+    })
+
     st.sidebar.markdown("---")
     st.sidebar.header("Export")
+    pdf_chart_format = st.sidebar.radio("Formát grafů v PDF", ["svg", "png"],
+                                        format_func=lambda x: "Vektorové (SVG)" if x == "svg" else "Rastrové (PNG)")
+    pdf_appendix = st.sidebar.checkbox("Přiložit kompletní hodinová data", value=False)
     if st.sidebar.button("Generovat PDF Report"):
         with st.spinner("Generuji PDF report..."):
             
@@ -177,11 +340,12 @@ def render_energy_dashboard():
             }
             
             # 2. Investment Data (Calculate even if on Energy Page)
-            # Default values if not set in sidebar (or grab from session state if we want persistence)
-            inv_cost = 350000.0
-            inv_years = 20
-            inv_sp500 = 8.0
-            inv_inflation = 3.0
+            # Values last set on the investment page, or the defaults
+            investment_inputs = st.session_state.get('investment_inputs', INVESTMENT_INPUT_DEFAULTS)
+            inv_cost = investment_inputs['investment_cost']
+            inv_years = investment_inputs['years']
+            inv_sp500 = investment_inputs['sp500_return_pct']
+            inv_inflation = investment_inputs['inflation_pct']
             
             inv_df = calculate_investment_comparison(
                 initial_investment_czk=inv_cost,
@@ -191,8 +355,7 @@ def render_energy_dashboard():
                 inflation_pct=inv_inflation
             )
             
-            payback_years = inv_df[inv_df['PV_Cumulative_CashFlow'] >= 0]['Year'].min()
-            financials_data['payback_years'] = str(payback_years) if not pd.isna(payback_years) else f"> {inv_years}"
+            financials_data['payback_years'] = format_payback(payback_period(inv_df), inv_years)
             
             investment_data = {
                 'investment_cost': inv_cost,
@@ -252,9 +415,17 @@ def render_energy_dashboard():
                 'energy_data': df_energy_table,
                 'investment_data': df_inv_table
             }
+            if weather_ensemble is not None:
+                dataframes['weather_ensemble'] = format_ensemble_summary(weather_ensemble['summary'])
             
             try:
-                pdf_bytes = generate_pdf_report(financials_data, energy_data, investment_data, input_params, figures, dataframes)
+                from reporter import generate_pdf_report
+                pdf_bytes = generate_pdf_report(
+                    financials_data, energy_data, investment_data, input_params, figures, dataframes,
+                    chart_format=pdf_chart_format,
+                    appendix_df=result_df if pdf_appendix else None,
+                    appendix_columns={col: name for col, name in column_mapping.items() if col in result_df}
+                )
                 st.sidebar.download_button(
                     label="Stáhnout PDF",
                     data=pdf_bytes,
@@ -265,6 +436,114 @@ def render_energy_dashboard():
             except Exception as e:
                 st.sidebar.error(f"Chyba při generování: {e}")
 
+    # Full data export, generated only when the download is clicked
+    export_format = st.sidebar.selectbox("Formát exportu dat", list(EXPORT_FORMATS),
+                                         format_func=lambda x: EXPORT_FORMATS[x]['label'])
+    st.sidebar.download_button(
+        label="Exportovat kompletní data",
+        data=lambda: export_to_bytes(result_df, export_format, electricity_price_buy=price_buy, electricity_price_sell=price_sell),
+        file_name=f"fve_data.{export_format}",
+        mime=EXPORT_FORMATS[export_format]['mime']
+    )
+
+def render_billing_comparison(result_df, consumption_df, production_df, battery_capacity, flexible_loads,
+                              price_power, price_distribution, price_sell):
+    """Compares supply products (standard, monthly netting, virtual battery) with and without the physical battery."""
+    st.subheader("Porovnání Tarifních Produktů")
+    
+    col_b1, col_b2, col_b3, col_b4 = st.columns(4)
+    with col_b1:
+        breaker = st.selectbox("Hlavní jistič", list(BREAKER_MONTHLY_CHARGES_CZK), index=list(BREAKER_MONTHLY_CHARGES_CZK).index('3x25A'))
+    with col_b2:
+        vb_monthly_fee = st.number_input("Virtuální baterie - měsíční poplatek (Kč)", min_value=0.0,
+                                         value=BILLING_PRODUCTS['virtual_battery']['monthly_fee_czk'], step=10.0)
+    with col_b3:
+        vb_capacity = st.number_input("Virtuální baterie - kapacita (kWh)", min_value=0.0,
+                                      value=BILLING_PRODUCTS['virtual_battery']['capacity_kwh'], step=100.0)
+    with col_b4:
+        vb_withdrawal_fee = st.number_input("Virtuální baterie - poplatek za odběr (Kč/kWh)", min_value=0.0,
+                                            value=BILLING_PRODUCTS['virtual_battery']['withdrawal_fee_czk_kwh'], step=0.05)
+    
+    products = [
+        make_billing_product('standard'),
+        make_billing_product('monthly_netting'),
+        make_billing_product('virtual_battery', monthly_fee_czk=vb_monthly_fee, capacity_kwh=vb_capacity,
+                             withdrawal_fee_czk_kwh=vb_withdrawal_fee)
+    ]
+    
+    scenarios = {f"Baterie {format_cz_number(battery_capacity)} kWh": result_df}
+    if battery_capacity > 0:
+        # The same profiles without the physical battery, to compare it with the virtual one
+        scenarios["Bez baterie"] = calculate_energy_balance(consumption_df, production_df, battery_capacity_kwh=0.0,
+                                                            flexible_loads=flexible_loads)
+    
+    prices = dict(price_power=price_power, price_distribution=price_distribution, price_sell=price_sell, breaker=breaker)
+    comparison = compare_billing_scenarios(scenarios, products, **prices)
+    
+    display_billing = comparison.rename(columns={
+        'scenario': 'Scénář',
+        'product': 'Produkt',
+        'power_czk': 'Silová elektřina',
+        'distribution_czk': 'Distribuce',
+        'fees_czk': 'Poplatky',
+        'fixed_charge_czk': 'Jistič',
+        'sale_revenue_czk': 'Příjem z prodeje',
+        'total_czk': 'Celkové náklady',
+        'cost_without_pv_czk': 'Náklady bez FVE',
+        'savings_czk': 'Roční úspora'
+    })
+    billing_format = {col: lambda x: f"{format_cz_number(x)} Kč" for col in display_billing.columns if col not in ('Scénář', 'Produkt')}
+    st.dataframe(display_billing.style.format(billing_format))
+    
+    monthly = compare_billing_products(result_df, products, **prices)['monthly']
+    st.plotly_chart(plot_billing_monthly(monthly), use_container_width=True)
+    st.markdown("---")
+
+def format_ensemble_summary(summary_df):
+    """Translates and formats the P50/P90 summary of the weather ensemble."""
+    table = summary_df.drop(columns=['metric']).rename(columns={'label': 'Veličina', 'min': 'Minimum', 'max': 'Maximum'})
+    for col in table.columns:
+        if col != 'Veličina':
+            table[col] = table[col].apply(format_cz_number)
+    return table
+
+def render_weather_ensemble(consumption_df, annual_consumption_kwh, kwp, battery_capacity, price_buy, price_sell, flexible_loads):
+    """Runs the energy balance over historical weather years, returns the ensemble result or None."""
+    st.subheader("Víceletá Simulace Počasí (P50/P90)")
+    
+    irradiance_dir = st.text_input("Složka s daty ozáření (CSV, jeden rok na soubor)",
+                                   value=os.environ.get("FVE_IRRADIANCE_DIR", "data/irradiance"))
+    performance_ratio = st.number_input("Performance ratio systému", min_value=0.5, max_value=1.0, value=0.85, step=0.01)
+    
+    # Results are kept only for the inputs they were computed with. The consumption profile is
+    # regenerated with new noise on every rerun, so it is keyed by its annual target instead.
+    ensemble_key = (irradiance_dir, performance_ratio, kwp, battery_capacity, price_buy, price_sell,
+                    annual_consumption_kwh, repr(flexible_loads))
+    
+    if st.button("Spustit simulaci meteorologických let"):
+        if not os.path.isdir(irradiance_dir):
+            st.error(f"Složka {irradiance_dir} neexistuje.")
+        else:
+            with st.spinner("Simuluji meteorologické roky..."):
+                try:
+                    production_years = load_production_years(irradiance_dir, kwp=kwp, performance_ratio=performance_ratio,
+                                                              datetimes=consumption_df['datetime'])
+                    ensemble = run_weather_ensemble(consumption_df, production_years, battery_capacity_kwh=battery_capacity,
+                                                    electricity_price_buy=price_buy, electricity_price_sell=price_sell,
+                                                    flexible_loads=flexible_loads)
+                    st.session_state['weather_ensemble'] = {'key': ensemble_key, 'result': ensemble}
+                except ValueError as e:
+                    st.error(f"Chyba při načítání dat ozáření: {e}")
+    
+    stored = st.session_state.get('weather_ensemble')
+    if stored is None or stored['key'] != ensemble_key:
+        return None
+    
+    ensemble = stored['result']
+    st.dataframe(format_ensemble_summary(ensemble['summary']))
+    st.plotly_chart(plot_weather_ensemble(ensemble['years'], ensemble['summary']), use_container_width=True)
+    return ensemble
+
 def render_economic_dashboard():
     st.title("💰 fveAnalyzator - Ekonomika a Investice")
     
@@ -275,13 +554,23 @@ def render_economic_dashboard():
         annual_savings = st.session_state['annual_savings']
         st.info(f"Použita vypočtená roční úspora: {format_cz_number(annual_savings)} Kč")
 
+    # Kept in session state, so the values are saved with scenarios and survive page switches
+    investment_inputs = st.session_state.get('investment_inputs', INVESTMENT_INPUT_DEFAULTS)
+
     st.sidebar.header("Investiční Parametry")
-    investment_cost = st.sidebar.number_input("Pořizovací cena FVE (CZK)", value=350000.0, step=10000.0)
-    years = st.sidebar.slider("Horizont (roky)", 5, 30, 20)
+    investment_cost = st.sidebar.number_input("Pořizovací cena FVE (CZK)", value=float(investment_inputs['investment_cost']), step=10000.0)
+    years = st.sidebar.slider("Horizont (roky)", 5, 30, int(investment_inputs['years']))
     
     st.sidebar.header("Tržní Parametry")
-    sp500_return = st.sidebar.slider("Očekávaný výnos S&P 500 (%)", 0.0, 15.0, 8.0, 0.1)
-    inflation = st.sidebar.slider("Inflace / Růst cen energie (%)", 0.0, 10.0, 3.0, 0.1)
+    sp500_return = st.sidebar.slider("Očekávaný výnos S&P 500 (%)", 0.0, 15.0, float(investment_inputs['sp500_return_pct']), 0.1)
+    inflation = st.sidebar.slider("Inflace / Růst cen energie (%)", 0.0, 10.0, float(investment_inputs['inflation_pct']), 0.1)
+
+    st.session_state['investment_inputs'] = {
+        'investment_cost': investment_cost,
+        'years': years,
+        'sp500_return_pct': sp500_return,
+        'inflation_pct': inflation
+    }
 
     # Calculation
     df = calculate_investment_comparison(
@@ -293,11 +582,7 @@ def render_economic_dashboard():
     )
     
     # Metrics
-    payback_years = df[df['PV_Cumulative_CashFlow'] >= 0]['Year'].min()
-    if pd.isna(payback_years):
-        payback_str = "> " + str(years)
-    else:
-        payback_str = str(payback_years)
+    payback_str = format_payback(payback_period(df), years)
         
     final_pv_gain = df['PV_Cumulative_CashFlow'].iloc[-1]
     final_pv_reinvest_gain = df['PV_Reinvest_Net_Result'].iloc[-1]
@@ -334,11 +619,204 @@ def render_economic_dashboard():
     
     st.dataframe(display_inv_df.style.format(inv_format_dict))
 
+    render_sensitivity_analysis(investment_cost, years, sp500_return, inflation)
+
+def render_sensitivity_analysis(investment_cost, years, sp500_return, inflation):
+    st.markdown("---")
+    st.subheader("Citlivostní Analýza")
+    
+    if 'energy_inputs' not in st.session_state:
+        st.info("Citlivostní analýza vyžaduje výpočet na stránce 'Energetická Bilance'.")
+        return
+    energy_inputs = st.session_state['energy_inputs']
+    
+    col_s1, col_s2 = st.columns(2)
+    with col_s1:
+        metric = st.selectbox("Sledovaná veličina", list(SENSITIVITY_METRICS), format_func=lambda x: SENSITIVITY_METRICS[x])
+    with col_s2:
+        variation = st.slider("Změna parametrů (± %)", 5, 50, 20, 5)
+    
+    col_s3, col_s4 = st.columns(2)
+    parameter_labels = {param: spec['label'] for param, spec in SENSITIVITY_PARAMETERS.items()}
+    with col_s3:
+        param_x = st.selectbox("Tabulka - parametr 1", list(parameter_labels), index=0, format_func=parameter_labels.get)
+    with col_s4:
+        param_y = st.selectbox("Tabulka - parametr 2", list(parameter_labels), index=2, format_func=parameter_labels.get)
+    
+    fast_mode = st.checkbox("Rychlý režim (reprezentativní dny)", value=False)
+    n_representative_days = st.slider("Počet reprezentativních dnů", 4, 48, 12) if fast_mode else None
+    
+    if not st.button("Spustit citlivostní analýzu"):
+        return
+    
+    base_case = {
+        'kwp': energy_inputs['kwp'],
+        'battery_capacity': energy_inputs['battery_capacity'],
+        'price_power': energy_inputs['price_power'],
+        'price_distribution': energy_inputs['price_distribution'],
+        'price_sell': energy_inputs['price_sell'],
+        'investment_cost': investment_cost,
+        'inflation_pct': inflation,
+        'sp500_return_pct': sp500_return
+    }
+    
+    with st.spinner("Počítám citlivostní analýzu..."):
+        engine = SensitivityEngine(energy_inputs['consumption_df'], energy_inputs['production_df'], base_case,
+                                   years=years, flexible_loads=energy_inputs['flexible_loads'],
+                                   n_representative_days=n_representative_days,
+                                   reference_case={**SCENARIO_INPUT_DEFAULTS, **INVESTMENT_INPUT_DEFAULTS})
+        tornado_df = engine.tornado(metric, variation_pct=variation)
+        steps = [-variation, -variation / 2, 0, variation / 2, variation]
+        spider_df = engine.spider(metric, steps_pct=steps)
+        table_df = engine.two_way_table(param_x, param_y, metric, steps_pct=steps) if param_x != param_y else None
+    
+    col_t1, col_t2 = st.columns(2)
+    with col_t1:
+        st.plotly_chart(plot_tornado(tornado_df, SENSITIVITY_METRICS[metric]), use_container_width=True)
+    with col_t2:
+        st.plotly_chart(plot_spider(spider_df, SENSITIVITY_METRICS[metric]), use_container_width=True)
+    
+    if table_df is not None:
+        st.markdown(f"**{SENSITIVITY_METRICS[metric]}** podle změny parametrů (%)")
+        st.dataframe(table_df.style.format(format_cz_number))
+    
+    if fast_mode:
+        render_representative_days_error(energy_inputs, n_representative_days)
+
+def render_representative_days_error(energy_inputs, n_representative_days):
+    """Shows the error of the representative-day approximation against the full year for the base case."""
+    comparison = compare_with_full_year(
+        energy_inputs['consumption_df'], energy_inputs['production_df'],
+        battery_capacity_kwh=energy_inputs['battery_capacity'], n_days=n_representative_days,
+        flexible_loads=energy_inputs['flexible_loads'],
+        electricity_price_buy=energy_inputs['price_power'] + energy_inputs['price_distribution'],
+        electricity_price_sell=energy_inputs['price_sell']
+    )
+    
+    st.markdown(f"**Chyba aproximace ({n_representative_days} reprezentativních dnů)** - "
+                f"zrychlení simulace {comparison['speedup']:.0f}×")
+    
+    metric_labels = {
+        'consumption_kWh': 'Spotřeba (kWh)',
+        'production_kWh': 'Výroba (kWh)',
+        'grid_import_kWh': 'Nákup ze sítě (kWh)',
+        'grid_export_kWh': 'Prodej do sítě (kWh)',
+        'battery_charge_kWh': 'Nabíjení baterie (kWh)',
+        'battery_discharge_kWh': 'Vybíjení baterie (kWh)',
+        'flexible_load_kWh': 'Řízené spotřebiče (kWh)',
+        'savings_czk': 'Roční úspora (Kč)'
+    }
+    errors = comparison['errors'].copy()
+    errors['metric'] = errors['metric'].map(metric_labels)
+    errors = errors.rename(columns={
+        'metric': 'Veličina',
+        'full_year': 'Celý rok',
+        'representative_days': 'Reprezentativní dny',
+        'abs_error': 'Odchylka',
+        'rel_error_pct': 'Odchylka (%)'
+    })
+    st.dataframe(errors.style.format({col: format_cz_number for col in errors.columns if col != 'Veličina'}))
+
+
+# Scenario values compared side by side
+SCENARIO_COMPARISON_COLUMNS = {
+    'kwp': 'Výkon FVE (kWp)',
+    'battery_capacity': 'Kapacita baterie (kWh)',
+    'annual_consumption_mwh': 'Roční spotřeba (MWh)',
+    'investment_cost': 'Pořizovací cena FVE (Kč)',
+    'years': 'Horizont (roky)',
+    'sp500_return_pct': 'Výnos S&P 500 (%)',
+    'inflation_pct': 'Inflace (%)',
+    'savings_czk': 'Roční úspora (Kč)',
+    'cost_without_pv_czk': 'Náklady bez FVE (Kč)',
+    'cost_with_pv_czk': 'Náklady s FVE (Kč)',
+    'production_kWh': 'Výroba FVE (kWh)',
+    'self_consumption_kWh': 'Vlastní spotřeba (kWh)',
+    'grid_import_kWh': 'Nákup ze sítě (kWh)',
+    'grid_export_kWh': 'Prodej do sítě (kWh)',
+    'payback_years': 'Návratnost (roky)'
+}
+
+# Monthly values that can be compared
+SCENARIO_MONTHLY_COLUMNS = {
+    'production_kWh': 'Výroba FVE',
+    'grid_import_kWh': 'Nákup ze sítě',
+    'grid_export_kWh': 'Prodej do sítě',
+    'battery_discharge_kWh': 'Vybíjení baterie'
+}
+
+def render_scenario_comparison():
+    st.title("📊 fveAnalyzator - Porovnání scénářů")
+
+    store = get_scenario_store()
+    scenarios = store.list_scenarios()
+    if scenarios.empty:
+        st.info("Zatím nejsou uloženy žádné scénáře. Uložte je na stránce 'Energetická Bilance'.")
+        return
+
+    selected = st.multiselect(f"Scénáře (max. {MAX_COMPARED_SCENARIOS})", list(scenarios['name']),
+                              default=list(scenarios['name'][:min(3, len(scenarios))]),
+                              max_selections=MAX_COMPARED_SCENARIOS)
+    if not selected:
+        return
+
+    loaded = {}
+    for name in selected:
+        scenario = store.load(name)
+        if scenario is None:
+            st.warning(f"Výsledky scénáře '{name}' nebyly nalezeny, scénář je vynechán.")
+            continue
+        loaded[name] = scenario
+    if not loaded:
+        return
+
+    rows = []
+    investment_curves = {}
+    for name, scenario in loaded.items():
+        # Every scenario uses its own saved investment inputs
+        investment = scenario['investment'] or INVESTMENT_INPUT_DEFAULTS
+        inv_df = calculate_investment_comparison(
+            initial_investment_czk=investment['investment_cost'],
+            annual_savings_czk=scenario['metrics']['savings_czk'],
+            years=investment['years'],
+            sp500_return_pct=investment['sp500_return_pct'],
+            inflation_pct=investment['inflation_pct']
+        )
+        investment_curves[name] = inv_df
+        rows.append({'Scénář': name, **scenario['inputs'], **investment, **scenario['metrics'],
+                     'payback_years': payback_period(inv_df)})
+
+    st.subheader("Klíčové ukazatele")
+    metrics_df = pd.DataFrame(rows).set_index('Scénář')[list(SCENARIO_COMPARISON_COLUMNS)]
+    metrics_df = metrics_df.rename(columns=SCENARIO_COMPARISON_COLUMNS)
+    st.dataframe(metrics_df.style.format(format_cz_number))
+
+    st.subheader("Měsíční přehled")
+    monthly_column = st.selectbox("Veličina", list(SCENARIO_MONTHLY_COLUMNS),
+                                  format_func=lambda column: SCENARIO_MONTHLY_COLUMNS[column])
+    monthly_df = pd.DataFrame({
+        name: scenario['result_df'].groupby(scenario['result_df']['datetime'].dt.to_period('M'))[monthly_column].sum()
+        for name, scenario in loaded.items()
+    })
+    monthly_df.index = monthly_df.index.astype(str)
+    st.plotly_chart(plot_scenario_monthly(monthly_df, SCENARIO_MONTHLY_COLUMNS[monthly_column]), use_container_width=True)
+
+    st.subheader("Vývoj investice")
+    st.plotly_chart(plot_scenario_investment(investment_curves), use_container_width=True)
+
+    st.markdown("---")
+    if st.button("Smazat vybrané scénáře"):
+        for name in selected:
+            store.delete(name)
+        st.rerun()
+
 # Main Navigation
-page = st.sidebar.radio("Stránka", ["Energetická Bilance", "Ekonomika - Investice"])
+page = st.sidebar.radio("Stránka", ["Energetická Bilance", "Ekonomika - Investice", "Porovnání scénářů"])
 
 if page == "Energetická Bilance":
     render_energy_dashboard()
 elif page == "Ekonomika - Investice":
     render_economic_dashboard()
+elif page == "Porovnání scénářů":
+    render_scenario_comparison()
 
@@ -0,0 +1,220 @@
+import numpy as np
+import pandas as pd
+from analyzer import get_total_consumption
+
+# Indicative monthly fixed distribution charges by main breaker size (CZK/month, low voltage households).
+# Actual values depend on the distributor and the distribution tariff.
+BREAKER_MONTHLY_CHARGES_CZK = {
+    '1x25A': 150.0,
+    '3x16A': 200.0,
+    '3x20A': 250.0,
+    '3x25A': 310.0,
+    '3x32A': 400.0,
+    '3x40A': 500.0,
+    '3x50A': 625.0,
+    '3x63A': 790.0
+}
+
+# Supply products that can be compared side by side.
+# kind: 'standard' (per-kWh buy/sell), 'monthly_netting' (export offsets import within a month)
+#       or 'virtual_battery' (export is credited against later import).
+BILLING_PRODUCTS = {
+    'standard': {
+        'label': 'Standardní tarif',
+        'kind': 'standard',
+        'monthly_fee_czk': 0.0
+    },
+    'monthly_netting': {
+        'label': 'Měsíční netting',
+        'kind': 'monthly_netting',
+        'monthly_fee_czk': 0.0
+    },
+    'virtual_battery': {
+        'label': 'Virtuální baterie',
+        'kind': 'virtual_battery',
+        'monthly_fee_czk': 200.0,
+        'capacity_kwh': 1000.0,         # Credit limit, None = unlimited
+        'storage_fee_czk_kwh': 0.0,     # Fee per kWh credited
+        'withdrawal_fee_czk_kwh': 0.3,  # Fee per kWh drawn from the credit
+        'expire_yearly': True           # Unused credit expires at the end of the calendar year
+    }
+}
+
+def make_billing_product(kind, **overrides):
+    """
+    Creates a billing product definition from a preset, any preset value can be overridden.
+    """
+    if kind not in BILLING_PRODUCTS:
+        raise ValueError(f"Unknown billing product '{kind}', expected one of {list(BILLING_PRODUCTS)}.")
+    return {'id': kind, **BILLING_PRODUCTS[kind], **overrides}
+
+def _virtual_storage(export, grid_import, years, capacity_kwh=None):
+    """
+    Returns the energy credited to and withdrawn from a virtual battery in every interval.
+
+    Without a capacity limit the credit balance is the cumulative net export reflected at zero,
+    which is computed in a vectorized way. With a limit the balance is tracked interval by interval.
+    """
+    if capacity_kwh is None:
+        credited = export
+        net = pd.Series(export - grid_import)
+        cumulative = net.groupby(years).cumsum()
+        # Import that could not be covered by the credit pushes the balance back to zero
+        shortfall = (-cumulative.groupby(years).cummin()).clip(lower=0.0).to_numpy()
+        uncovered = np.diff(shortfall, prepend=0.0)
+        year_start = np.r_[True, years[1:] != years[:-1]]
+        uncovered[year_start] = shortfall[year_start]
+        withdrawn = grid_import - uncovered
+        return credited, withdrawn
+
+    credited = np.zeros(len(export))
+    withdrawn = np.zeros(len(export))
+    balance = 0.0
+    for t in range(len(export)):
+        if t > 0 and years[t] != years[t - 1]:
+            balance = 0.0
+        credited[t] = min(export[t], capacity_kwh - balance)
+        balance += credited[t]
+        withdrawn[t] = min(grid_import[t], balance)
+        balance -= withdrawn[t]
+    return credited, withdrawn
+
+def _bill_product(intervals, product, price_power, price_distribution, price_sell):
+    """
+    Computes the billed quantities of one product per interval and rolls them up by month.
+    Returns a monthly DataFrame with the cost components in CZK.
+    """
+    grid_import = intervals['grid_import_kWh'].to_numpy()
+    export = intervals['grid_export_kWh'].to_numpy()
+    months = intervals['month']
+
+    if product['kind'] == 'standard':
+        billed = pd.DataFrame({
+            'power_kWh': grid_import,
+            'distribution_kWh': grid_import,
+            'sold_kWh': export,
+            'fees_czk': 0.0
+        })
+
+    elif product['kind'] == 'monthly_netting':
+        # Netting is monthly, so the interval flows are rolled up first
+        monthly = pd.DataFrame({'import': grid_import, 'export': export}).groupby(months.to_numpy()).sum()
+        net = monthly['import'] - monthly['export']
+        billed = pd.DataFrame({
+            'power_kWh': net.clip(lower=0.0),
+            'distribution_kWh': monthly['import'],
+            'sold_kWh': (-net).clip(lower=0.0),
+            'fees_czk': 0.0
+        })
+        return _monthly_costs(billed, product, price_power, price_distribution, price_sell)
+
+    elif product['kind'] == 'virtual_battery':
+        if product.get('expire_yearly', True):
+            years = intervals['datetime'].dt.year.to_numpy()
+        else:
+            years = np.zeros(len(intervals), dtype=int)
+        credited, withdrawn = _virtual_storage(export, grid_import, years, product.get('capacity_kwh'))
+        billed = pd.DataFrame({
+            'power_kWh': grid_import - withdrawn,
+            # Withdrawn energy still pays distribution
+            'distribution_kWh': grid_import,
+            'sold_kWh': export - credited,
+            'fees_czk': credited * product.get('storage_fee_czk_kwh', 0.0)
+                        + withdrawn * product.get('withdrawal_fee_czk_kwh', 0.0)
+        })
+
+    else:
+        raise ValueError(f"Unknown billing product kind '{product['kind']}'.")
+
+    return _monthly_costs(billed.groupby(months.to_numpy()).sum(), product, price_power, price_distribution, price_sell)
+
+def _monthly_costs(monthly, product, price_power, price_distribution, price_sell):
+    costs = pd.DataFrame(index=monthly.index)
+    costs['power_czk'] = monthly['power_kWh'] * price_power
+    costs['distribution_czk'] = monthly['distribution_kWh'] * price_distribution
+    costs['sale_revenue_czk'] = monthly['sold_kWh'] * price_sell
+    costs['fees_czk'] = monthly['fees_czk'] + product.get('monthly_fee_czk', 0.0)
+    return costs
+
+def compare_billing_products(df, products, price_power=3.0, price_distribution=2.0, price_sell=2.0,
+                             breaker='3x25A', monthly_fixed_charge_czk=None):
+    """
+    Bills the interval energy flows with several products in one pass.
+
+    Args:
+        df (pd.DataFrame): Result of calculate_energy_balance.
+        products (list): Products created by make_billing_product.
+        price_power (float): Power price in CZK/kWh.
+        price_distribution (float): Distribution price in CZK/kWh.
+        price_sell (float): Feed-in price in CZK/kWh.
+        breaker (str): Main breaker size, key of BREAKER_MONTHLY_CHARGES_CZK.
+        monthly_fixed_charge_czk (float): Overrides the fixed charge of the breaker.
+
+    Returns:
+        dict: 'annual' DataFrame (one row per product, cost components, total cost and savings
+              against the bill without PV) and 'monthly' DataFrame of total costs (months x products).
+    """
+    if monthly_fixed_charge_czk is None:
+        monthly_fixed_charge_czk = BREAKER_MONTHLY_CHARGES_CZK[breaker]
+
+    intervals = pd.DataFrame({
+        'datetime': df['datetime'],
+        'month': df['datetime'].dt.to_period('M'),
+        'grid_import_kWh': df['grid_import_kWh'],
+        'grid_export_kWh': df['grid_export_kWh']
+    })
+    n_months = intervals['month'].nunique()
+
+    # Bill without PV: the whole consumption (including flexible loads) is bought
+    cost_without_pv = get_total_consumption(df) * (price_power + price_distribution) + n_months * monthly_fixed_charge_czk
+
+    annual_rows = []
+    monthly_totals = {}
+    for product in products:
+        costs = _bill_product(intervals, product, price_power, price_distribution, price_sell)
+        costs['fixed_charge_czk'] = monthly_fixed_charge_czk
+        costs['total_czk'] = (costs['power_czk'] + costs['distribution_czk'] + costs['fees_czk']
+                              + costs['fixed_charge_czk'] - costs['sale_revenue_czk'])
+
+        label = product.get('label', product['id'])
+        monthly_totals[label] = costs['total_czk']
+
+        totals = costs.sum()
+        annual_rows.append({
+            'product': label,
+            'power_czk': totals['power_czk'],
+            'distribution_czk': totals['distribution_czk'],
+            'fees_czk': totals['fees_czk'],
+            'fixed_charge_czk': totals['fixed_charge_czk'],
+            'sale_revenue_czk': totals['sale_revenue_czk'],
+            'total_czk': totals['total_czk'],
+            'cost_without_pv_czk': cost_without_pv,
+            'savings_czk': cost_without_pv - totals['total_czk']
+        })
+
+    monthly = pd.DataFrame(monthly_totals)
+    monthly.index = monthly.index.astype(str)
+
+    return {
+        'annual': pd.DataFrame(annual_rows),
+        'monthly': monthly
+    }
+
+def compare_billing_scenarios(scenarios, products, **kwargs):
+    """
+    Bills several energy balances (e.g. with and without a physical battery) with several products.
+
+    Args:
+        scenarios (dict): Scenario name -> result of calculate_energy_balance.
+        products (list): Products created by make_billing_product.
+        **kwargs: Prices and breaker, see compare_billing_products.
+
+    Returns:
+        pd.DataFrame: One row per scenario and product, sorted by the total cost.
+    """
+    frames = []
+    for name, df in scenarios.items():
+        annual = compare_billing_products(df, products, **kwargs)['annual']
+        annual.insert(0, 'scenario', name)
+        frames.append(annual)
+    return pd.concat(frames, ignore_index=True).sort_values('total_czk').reset_index(drop=True)
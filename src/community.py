@@ -0,0 +1,181 @@
+import pandas as pd
+import numpy as np
+from analyzer import _dispatch_battery
+
+# Allocation keys supported by the energy community simulation (sdílení elektřiny)
+ALLOCATION_KEYS = ['static', 'proportional', 'priority']
+
+def build_site_matrix(site_dfs, column):
+    """
+    Stacks one column of several per-site DataFrames into a (sites x intervals) matrix.
+    All DataFrames must share the same 'datetime' index.
+    Returns the matrix and the common datetime index.
+    """
+    datetimes = site_dfs[0]['datetime'].reset_index(drop=True)
+    matrix = np.empty((len(site_dfs), len(datetimes)))
+
+    for i, site_df in enumerate(site_dfs):
+        if len(site_df) != len(datetimes) or not site_df['datetime'].reset_index(drop=True).equals(datetimes):
+            raise ValueError(f"Site {i} does not share the community time axis.")
+        matrix[i] = site_df[column].to_numpy(dtype=float)
+
+    return matrix, datetimes
+
+def allocate_shared_energy(pool, deficits, allocation_key='static', static_shares=None, priorities=None):
+    """
+    Allocates the pooled export surplus to member deficits in every interval.
+
+    Args:
+        pool (np.ndarray): Pooled surplus per interval (intervals,).
+        deficits (np.ndarray): Remaining grid import per member (sites x intervals).
+        allocation_key (str): 'static', 'proportional' or 'priority'.
+        static_shares (list): Share of the pool per member for the static key (sums to 1).
+        priorities (list): Priority per member for the priority key (lower = served first).
+
+    Returns:
+        np.ndarray: Allocated energy per member (sites x intervals).
+    """
+    n_sites = deficits.shape[0]
+
+    if allocation_key == 'static':
+        # Fixed share of the pool, the unused part of a share is exported to the grid
+        if static_shares is None:
+            static_shares = np.full(n_sites, 1.0 / n_sites)
+        shares = np.asarray(static_shares, dtype=float)
+        if shares.shape != (n_sites,) or np.any(shares < 0) or shares.sum() > 1.0 + 1e-9:
+            raise ValueError("Static shares must be non-negative, one per site and sum to at most 1.")
+        return np.minimum(shares[:, None] * pool[None, :], deficits)
+
+    if allocation_key == 'proportional':
+        # Dynamic key - the pool is split proportionally to the current deficits
+        total_deficit = deficits.sum(axis=0)
+        coverage = np.divide(pool, total_deficit, out=np.zeros_like(pool), where=total_deficit > 0)
+        return deficits * np.minimum(coverage, 1.0)[None, :]
+
+    if allocation_key == 'priority':
+        # Deficits are filled one member after another in the order of priority
+        if priorities is None:
+            priorities = np.arange(n_sites)
+        order = np.argsort(np.asarray(priorities), kind='stable')
+        ordered_deficits = deficits[order]
+        demand_before = np.cumsum(ordered_deficits, axis=0) - ordered_deficits
+        ordered_allocation = np.clip(pool[None, :] - demand_before, 0.0, ordered_deficits)
+        allocation = np.empty_like(ordered_allocation)
+        allocation[order] = ordered_allocation
+        return allocation
+
+    raise ValueError(f"Unknown allocation key '{allocation_key}', expected one of {ALLOCATION_KEYS}.")
+
+def simulate_energy_community(consumption_matrix, production_matrix, battery_capacity_kwh=0.0,
+                              allocation_key='static', static_shares=None, priorities=None,
+                              price_power=3.0, price_distribution=2.0, price_sell=2.0,
+                              shared_energy_price=None, site_names=None):
+    """
+    Simulates an energy community (sdílení elektřiny) over many sites.
+
+    Every site first runs its own balance (self-consumption and battery), then the pooled
+    export surplus of all sites is allocated to member deficits per interval.
+    Shared energy replaces the power component of grid import, the distribution component
+    is still billed. Receivers pay the settlement price for shared kWh and the givers receive it.
+
+    Args:
+        consumption_matrix (np.ndarray): Consumption per site (sites x intervals) in kWh.
+        production_matrix (np.ndarray): Production per site (sites x intervals) in kWh.
+        battery_capacity_kwh (float or list): Battery capacity, scalar or one per site.
+        allocation_key (str): 'static', 'proportional' or 'priority'.
+        static_shares (list): Shares for the static key.
+        priorities (list): Priorities for the priority key.
+        price_power (float): Power price in CZK/kWh.
+        price_distribution (float): Distribution price in CZK/kWh, paid for grid and shared kWh.
+        price_sell (float): Feed-in price in CZK/kWh.
+        shared_energy_price (float): Settlement price of shared kWh paid by receivers to givers
+                                     (default: price_sell, so givers earn the same as from the feed-in).
+        site_names (list): Optional member names.
+
+    Returns:
+        dict: 'members' DataFrame with per-member balance and savings,
+              'community' dict with totals and 'shared_kWh' (sites x intervals) matrix.
+    """
+    consumption = np.atleast_2d(np.asarray(consumption_matrix, dtype=float))
+    production = np.atleast_2d(np.asarray(production_matrix, dtype=float))
+    if consumption.shape != production.shape:
+        raise ValueError("Consumption and production matrices must have the same shape.")
+    n_sites = consumption.shape[0]
+    if shared_energy_price is None:
+        shared_energy_price = price_sell
+    price_buy = price_power + price_distribution
+
+    # 1. Own balance of every site
+    flows = _dispatch_battery(consumption, production, battery_capacity_kwh)
+    own_import = flows['grid_import_kWh']
+    own_export = flows['grid_export_kWh']
+
+    # 2. Allocation of the pooled surplus
+    pool = own_export.sum(axis=0)
+    shared = allocate_shared_energy(pool, own_import, allocation_key, static_shares, priorities)
+    shared_total = shared.sum(axis=0)
+
+    # Each producer gives away the allocated energy in proportion to its export
+    given_ratio = np.divide(shared_total, pool, out=np.zeros_like(pool), where=pool > 0)
+    given = own_export * given_ratio[None, :]
+
+    final_import = own_import - shared
+    final_export = own_export - given
+
+    # 3. Per-member financials
+    total_consumption = consumption.sum(axis=1)
+    own_import_sum = own_import.sum(axis=1)
+    own_export_sum = own_export.sum(axis=1)
+    shared_sum = shared.sum(axis=1)
+    given_sum = given.sum(axis=1)
+
+    cost_without_pv = total_consumption * price_buy
+    cost_standalone = own_import_sum * price_buy - own_export_sum * price_sell
+    # Internal transfer between members, it sums to zero over the community
+    shared_payment = shared_sum * shared_energy_price
+    shared_revenue = given_sum * shared_energy_price
+    cost_with_sharing = (final_import.sum(axis=1) * price_buy
+                         + shared_sum * price_distribution
+                         + shared_payment
+                         - shared_revenue
+                         - final_export.sum(axis=1) * price_sell)
+
+    if site_names is None:
+        site_names = [f"Odběrné místo {i + 1}" for i in range(n_sites)]
+
+    members = pd.DataFrame({
+        'site': site_names,
+        'consumption_kWh': total_consumption,
+        'production_kWh': production.sum(axis=1),
+        'own_import_kWh': own_import_sum,
+        'own_export_kWh': own_export_sum,
+        'shared_received_kWh': shared_sum,
+        'shared_given_kWh': given_sum,
+        'grid_import_kWh': final_import.sum(axis=1),
+        'grid_export_kWh': final_export.sum(axis=1),
+        'shared_payment_czk': shared_payment,
+        'shared_revenue_czk': shared_revenue,
+        'cost_without_pv_czk': cost_without_pv,
+        'cost_standalone_czk': cost_standalone,
+        'cost_with_sharing_czk': cost_with_sharing,
+        'savings_czk': cost_without_pv - cost_with_sharing,
+        'sharing_benefit_czk': cost_standalone - cost_with_sharing
+    })
+
+    community = {
+        'members': n_sites,
+        'total_consumption_kWh': total_consumption.sum(),
+        'total_production_kWh': production.sum(),
+        'total_pool_kWh': pool.sum(),
+        'total_shared_kWh': shared_total.sum(),
+        'total_import_kWh': final_import.sum(),
+        'total_export_kWh': final_export.sum(),
+        'savings_czk': members['savings_czk'].sum(),
+        'sharing_benefit_czk': members['sharing_benefit_czk'].sum()
+    }
+
+    return {
+        'members': members,
+        'community': community,
+        'shared_kWh': shared
+    }
@@ -1,3 +1,4 @@
+import os
 import pandas as pd
 import numpy as np
 
@@ -49,3 +50,73 @@ def load_production_data(kwp=10):
     production = kwp * day_factor * season_factor * weather_factor
     
     return pd.DataFrame({'datetime': dates, 'production_kWh': production})
+
+# Column names of supported irradiance files (own CSV format and the PVGIS hourly export)
+IRRADIANCE_COLUMNS = {
+    'datetime': 'datetime',
+    'time': 'datetime',
+    'irradiance_Wm2': 'irradiance_Wm2',
+    'G(i)': 'irradiance_Wm2'
+}
+
+def load_irradiance_file(path):
+    """
+    Loads one year of hourly plane-of-array irradiance (W/m2) from a local CSV file.
+    Supports a plain CSV with 'datetime' and 'irradiance_Wm2' columns and the PVGIS
+    hourly export (columns 'time' and 'G(i)', metadata lines before and after the table).
+    """
+    with open(path, encoding='utf-8') as f:
+        lines = f.readlines()
+
+    # Skip metadata lines before the table header
+    header_index = next((i for i, line in enumerate(lines) if line.split(',')[0].strip() in ('datetime', 'time')), None)
+    if header_index is None:
+        raise ValueError(f"No irradiance table found in {path}.")
+
+    df = pd.read_csv(path, skiprows=header_index, on_bad_lines='skip')
+    # PVGIS uses timestamps like 20200101:0010
+    datetime_format = '%Y%m%d:%H%M' if 'time' in df.columns else None
+    df = df.rename(columns=IRRADIANCE_COLUMNS)[['datetime', 'irradiance_Wm2']]
+    df['irradiance_Wm2'] = pd.to_numeric(df['irradiance_Wm2'], errors='coerce')
+    df['datetime'] = pd.to_datetime(df['datetime'], format=datetime_format, errors='coerce')
+    df = df.dropna()
+    df['datetime'] = df['datetime'].dt.floor('h')
+    return df.groupby('datetime', as_index=False)['irradiance_Wm2'].mean()
+
+def production_from_irradiance(irradiance_df, kwp=10, performance_ratio=0.85, datetimes=None):
+    """
+    Converts hourly irradiance to PV production and maps it onto the simulation time axis
+    (by month, day and hour), so weather years can be combined with any consumption profile.
+    """
+    if datetimes is None:
+        datetimes = pd.date_range(start='2024-01-01', end='2024-12-31 23:00:00', freq='h')
+    datetimes = pd.DatetimeIndex(datetimes)
+
+    source = irradiance_df.set_index('datetime')['irradiance_Wm2']
+    source = source.groupby([source.index.month, source.index.day, source.index.hour]).mean()
+
+    target = pd.MultiIndex.from_arrays([datetimes.month, datetimes.day, datetimes.hour])
+    # Missing hours (e.g. 29 February in a non-leap weather year) take the same hour of the previous day
+    irradiance = pd.Series(source.reindex(target).to_numpy())
+    hours = datetimes.hour
+    irradiance = irradiance.groupby(hours).ffill().groupby(hours).bfill().fillna(0.0).to_numpy()
+
+    production = kwp * irradiance / 1000 * performance_ratio
+
+    return pd.DataFrame({'datetime': datetimes, 'production_kWh': production})
+
+def load_production_years(directory, kwp=10, performance_ratio=0.85, datetimes=None):
+    """
+    Loads all irradiance files (*.csv) in a directory, one weather year per file.
+    Returns a dict of file name (without extension) -> production array on the simulation time axis.
+    """
+    files = sorted(name for name in os.listdir(directory) if name.lower().endswith('.csv'))
+    if not files:
+        raise ValueError(f"No irradiance files (*.csv) found in {directory}.")
+
+    years = {}
+    for name in files:
+        irradiance_df = load_irradiance_file(os.path.join(directory, name))
+        production_df = production_from_irradiance(irradiance_df, kwp, performance_ratio, datetimes)
+        years[os.path.splitext(name)[0]] = production_df['production_kWh'].to_numpy()
+    return years
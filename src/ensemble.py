@@ -0,0 +1,152 @@
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from analyzer import _dispatch_battery, calculate_financials
+
+# Exceedance levels reported by the ensemble (P90 = value exceeded in 90 % of the years)
+EXCEEDANCE_LEVELS = (50, 90)
+
+def _to_shared(array):
+    """
+    Copies an array into a new shared memory block.
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    return shm
+
+def _attach_shared(name):
+    """
+    Attaches to a shared memory block created by the parent process without taking ownership of it.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Pool workers share the resource tracker of the parent, so the repeated
+    # registration does not unlink the block when a worker exits
+    return shared_memory.SharedMemory(name=name)
+
+def _simulate_years(spec, year_indices, battery_capacity_kwh, flexible_loads, datetimes):
+    """
+    Runs the energy balance for a batch of weather years (executed in the process pool).
+    Inputs are read from shared memory, only the annual totals are returned.
+    """
+    consumption_shm = _attach_shared(spec['consumption'])
+    production_shm = _attach_shared(spec['production'])
+    try:
+        n_intervals = spec['n_intervals']
+        consumption = np.ndarray((n_intervals,), dtype=np.float64, buffer=consumption_shm.buf)
+        production = np.ndarray((spec['n_years'], n_intervals), dtype=np.float64, buffer=production_shm.buf)
+
+        # All years of the batch are dispatched at once, like sites of an energy community
+        batch = production[year_indices]
+        flows = _dispatch_battery(np.broadcast_to(consumption, batch.shape), batch, battery_capacity_kwh,
+                                  flexible_loads=flexible_loads, datetimes=datetimes)
+
+        totals = {
+            'consumption_kWh': np.full(len(year_indices), consumption.sum()),
+            'production_kWh': batch.sum(axis=1),
+            'grid_import_kWh': flows['grid_import_kWh'].sum(axis=1),
+            'grid_export_kWh': flows['grid_export_kWh'].sum(axis=1)
+        }
+        if 'flexible_load_kWh' in flows:
+            totals['flexible_load_kWh'] = flows['flexible_load_kWh'].sum(axis=1)
+        return year_indices, totals
+    finally:
+        del consumption, production
+        consumption_shm.close()
+        production_shm.close()
+
+def exceedance(values, level):
+    """
+    Returns the value exceeded with the given probability (P50, P90, ...).
+    """
+    return np.percentile(values, 100 - level)
+
+def run_weather_ensemble(consumption_df, production_years, battery_capacity_kwh=10.0,
+                         electricity_price_buy=5.0, electricity_price_sell=2.0,
+                         flexible_loads=None, max_workers=None):
+    """
+    Runs the energy balance over several historical weather years in parallel.
+
+    The consumption profile and the production matrix are placed in shared memory once,
+    workers attach to them instead of receiving their own copies.
+
+    Args:
+        consumption_df (pd.DataFrame): Consumption profile ('datetime', 'consumption_kWh').
+        production_years (dict): Weather year label -> production array on the same time axis
+                                 (see data_loader.load_production_years).
+        battery_capacity_kwh (float): Battery capacity.
+        electricity_price_buy (float): Purchase price in CZK/kWh.
+        electricity_price_sell (float): Feed-in price in CZK/kWh.
+        flexible_loads (list): Optional flexible loads.
+        max_workers (int): Size of the process pool (default: number of CPUs).
+
+    Returns:
+        dict: 'years' DataFrame with the results of every weather year and
+              'summary' DataFrame with P50/P90 of production, self-consumption and savings.
+    """
+    labels = list(production_years)
+    consumption = consumption_df['consumption_kWh'].to_numpy(dtype=np.float64)
+    production = np.vstack([np.asarray(production_years[label], dtype=np.float64) for label in labels])
+    if production.shape[1] != len(consumption):
+        raise ValueError("Weather years must be on the same time axis as the consumption profile.")
+
+    datetimes = consumption_df['datetime'] if flexible_loads else None
+    max_workers = min(max_workers or os.cpu_count() or 1, len(labels))
+    batches = [batch.tolist() for batch in np.array_split(np.arange(len(labels)), max_workers)]
+
+    consumption_shm = _to_shared(consumption)
+    production_shm = _to_shared(production)
+    spec = {
+        'consumption': consumption_shm.name,
+        'production': production_shm.name,
+        'n_intervals': len(consumption),
+        'n_years': len(labels)
+    }
+    try:
+        if max_workers == 1:
+            results = [_simulate_years(spec, batch, battery_capacity_kwh, flexible_loads, datetimes) for batch in batches]
+        else:
+            # Workers are spawned, forking the multi-threaded Streamlit server can deadlock.
+            # They attach to the shared memory blocks by name.
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+                futures = [executor.submit(_simulate_years, spec, batch, battery_capacity_kwh, flexible_loads, datetimes)
+                           for batch in batches]
+                results = [future.result() for future in futures]
+    finally:
+        consumption_shm.close()
+        consumption_shm.unlink()
+        production_shm.close()
+        production_shm.unlink()
+
+    rows = [None] * len(labels)
+    for year_indices, totals in results:
+        for i, year_index in enumerate(year_indices):
+            year_totals = pd.DataFrame({column: [values[i]] for column, values in totals.items()})
+            financials = calculate_financials(year_totals, electricity_price_buy, electricity_price_sell)
+            rows[year_index] = {
+                'year': labels[year_index],
+                'production_kWh': year_totals['production_kWh'].iloc[0],
+                'self_consumption_kWh': year_totals['production_kWh'].iloc[0] - financials['total_export_kWh'],
+                'grid_import_kWh': financials['total_import_kWh'],
+                'grid_export_kWh': financials['total_export_kWh'],
+                'savings_czk': financials['savings_czk']
+            }
+    years_df = pd.DataFrame(rows)
+
+    summary = pd.DataFrame({
+        'metric': ['production_kWh', 'self_consumption_kWh', 'savings_czk'],
+        'label': ['Výroba FVE (kWh)', 'Vlastní spotřeba (kWh)', 'Roční úspora (Kč)']
+    })
+    for level in EXCEEDANCE_LEVELS:
+        summary[f'P{level}'] = [exceedance(years_df[metric], level) for metric in summary['metric']]
+    summary['min'] = [years_df[metric].min() for metric in summary['metric']]
+    summary['max'] = [years_df[metric].max() for metric in summary['metric']]
+
+    return {
+        'years': years_df,
+        'summary': summary
+    }
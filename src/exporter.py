@@ -0,0 +1,130 @@
+import io
+
+# Supported export formats (the key is the file extension)
+EXPORT_FORMATS = {
+    'xlsx': {'label': 'Excel (XLSX)', 'mime': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'},
+    'csv': {'label': 'CSV', 'mime': 'text/csv'},
+    'parquet': {'label': 'Parquet', 'mime': 'application/vnd.apache.parquet'}
+}
+
+# Rows converted and written at once, keeps memory constant for multi-year exports
+EXPORT_CHUNK_ROWS = 8760
+
+# Excel limit of rows per sheet (including the header)
+XLSX_MAX_ROWS = 1048576
+
+def iter_export_chunks(frames, electricity_price_buy=5.0, electricity_price_sell=2.0, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Yields (scenario name, chunk) pairs with all energy flows and per-interval costs.
+
+    Args:
+        frames (dict): Scenario name -> result DataFrame of calculate_energy_balance.
+        electricity_price_buy (float): Purchase price in CZK/kWh.
+        electricity_price_sell (float): Feed-in price in CZK/kWh.
+        chunk_rows (int): Number of rows per chunk.
+    """
+    for name, df in frames.items():
+        for start in range(0, len(df), chunk_rows):
+            chunk = df.iloc[start:start + chunk_rows].copy()
+            chunk['import_cost_czk'] = chunk['grid_import_kWh'] * electricity_price_buy
+            chunk['export_revenue_czk'] = chunk['grid_export_kWh'] * electricity_price_sell
+            chunk['net_cost_czk'] = chunk['import_cost_czk'] - chunk['export_revenue_czk']
+            yield name, chunk
+
+def write_csv(frames, target, electricity_price_buy=5.0, electricity_price_sell=2.0, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Writes all scenarios to one CSV file (binary target), with a 'scenario' column.
+    """
+    text = io.TextIOWrapper(target, encoding='utf-8', newline='', write_through=True)
+    header_written = False
+    for name, chunk in iter_export_chunks(frames, electricity_price_buy, electricity_price_sell, chunk_rows):
+        chunk.insert(0, 'scenario', name)
+        chunk.to_csv(text, index=False, header=not header_written, date_format='%Y-%m-%d %H:%M')
+        header_written = True
+    text.flush()
+    # Keep the target open for the caller
+    text.detach()
+
+def write_xlsx(frames, target, electricity_price_buy=5.0, electricity_price_sell=2.0, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Writes every scenario to its own sheet using the constant-memory write-only mode of openpyxl.
+    Scenarios longer than the Excel row limit continue on the next sheet.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheets = {}
+
+    def new_sheet(name, columns):
+        index = sheets.get(name, {}).get('index', 0) + 1
+        # Sheet titles are limited to 31 characters and must be unique
+        title = name[:31] if index == 1 else f"{name[:26]} ({index})"
+        sheet = workbook.create_sheet(title=title)
+        sheet.append(columns)
+        sheets[name] = {'sheet': sheet, 'rows': 1, 'index': index}
+        return sheets[name]
+
+    for name, chunk in iter_export_chunks(frames, electricity_price_buy, electricity_price_sell, chunk_rows):
+        columns = list(chunk.columns)
+        state = sheets.get(name) or new_sheet(name, columns)
+        for row in chunk.itertuples(index=False, name=None):
+            if state['rows'] >= XLSX_MAX_ROWS:
+                state = new_sheet(name, columns)
+            state['sheet'].append(row)
+            state['rows'] += 1
+
+    workbook.save(target)
+
+def write_parquet(frames, target, electricity_price_buy=5.0, electricity_price_sell=2.0, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Writes all scenarios to one Parquet file, every chunk becomes a row group.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for name, chunk in iter_export_chunks(frames, electricity_price_buy, electricity_price_sell, chunk_rows):
+            chunk.insert(0, 'scenario', name)
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(target, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+_WRITERS = {
+    'xlsx': write_xlsx,
+    'csv': write_csv,
+    'parquet': write_parquet
+}
+
+def export_results(frames, export_format, target, electricity_price_buy=5.0, electricity_price_sell=2.0):
+    """
+    Writes the interval results of one or more scenarios to a binary file-like target.
+
+    Args:
+        frames (dict or pd.DataFrame): Scenario name -> result DataFrame, or a single DataFrame.
+        export_format (str): 'xlsx', 'csv' or 'parquet'.
+        target: Binary file-like object or path.
+    """
+    if export_format not in _WRITERS:
+        raise ValueError(f"Unknown export format '{export_format}', expected one of {list(EXPORT_FORMATS)}.")
+    if not isinstance(frames, dict):
+        frames = {'Scénář': frames}
+
+    if isinstance(target, str):
+        with open(target, 'wb') as f:
+            _WRITERS[export_format](frames, f, electricity_price_buy, electricity_price_sell)
+    else:
+        _WRITERS[export_format](frames, target, electricity_price_buy, electricity_price_sell)
+
+def export_to_bytes(frames, export_format, electricity_price_buy=5.0, electricity_price_sell=2.0):
+    """
+    Exports the results into memory and returns the file content.
+    The rows are converted chunk by chunk, only the finished file is held in memory.
+    """
+    target = io.BytesIO()
+    export_results(frames, export_format, target, electricity_price_buy, electricity_price_sell)
+    return target.getvalue()
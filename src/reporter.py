@@ -1,11 +1,115 @@
 import base64
-import io
-from jinja2 import Environment, FileSystemLoader
-from weasyprint import HTML
-import plotly.io as pio
 import datetime
+import os
+import re
+import threading
 
-def generate_pdf_report(financials, energy_balance, investment_data, input_params, figures_dict, dataframes_dict, template_path="src/templates"):
+# The PDF stack (WeasyPrint, Jinja2, Plotly/Kaleido) is heavy to import, so it is
+# loaded only when a report is generated or when the renderer is warmed up.
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+
+# Directory of the bundled report template
+DEFAULT_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+# Compiled Jinja templates, keyed by (template directory, template name)
+_template_cache = {}
+_template_lock = threading.Lock()
+
+# Figure size in the report (pixels, PNG is rasterized at 2x scale)
+CHART_WIDTH = 800
+CHART_HEIGHT = 500
+
+def _get_template(template_path, name="report.html"):
+    """
+    Returns a compiled template, the Jinja environment is created only once per directory.
+    """
+    from jinja2 import Environment, FileSystemLoader
+
+    key = (os.path.abspath(template_path), name)
+    with _template_lock:
+        if key not in _template_cache:
+            env = Environment(loader=FileSystemLoader(key[0]), auto_reload=False)
+            _template_cache[key] = env.get_template(name)
+        return _template_cache[key]
+
+def _render_chart(fig, chart_format):
+    """
+    Renders a figure either as a base64 PNG or as inline vector SVG markup.
+    """
+    import plotly.io as pio
+
+    # Update layout for print (white background)
+    fig.update_layout(template="plotly_white")
+
+    if chart_format == "svg":
+        svg = pio.to_image(fig, format="svg", width=CHART_WIDTH, height=CHART_HEIGHT).decode('utf-8')
+        # Drop the XML prolog and let the chart scale to its container
+        svg = svg[svg.index('<svg'):]
+        root_end = svg.index('>')
+        root = svg[:root_end]
+        if 'viewBox' not in root:
+            root += f' viewBox="0 0 {CHART_WIDTH} {CHART_HEIGHT}"'
+        root = re.sub(r'\s(width|height)="[^"]*"', '', root) + ' width="100%"'
+        return root + svg[root_end:]
+
+    img_bytes = pio.to_image(fig, format="png", width=CHART_WIDTH, height=CHART_HEIGHT, scale=2)
+    return base64.b64encode(img_bytes).decode('utf-8')
+
+def _iter_appendix_pages(df, columns, rows_per_page):
+    """
+    Yields the appendix table page by page as lists of formatted rows,
+    so the full year is never converted to one big HTML table or DataFrame copy.
+    """
+    for start in range(0, len(df), rows_per_page):
+        page = df.iloc[start:start + rows_per_page]
+        formatted = []
+        for column in columns:
+            if column == 'datetime':
+                formatted.append(page[column].dt.strftime('%d.%m.%Y %H:%M').tolist())
+            else:
+                formatted.append([f"{value:.3f}".replace(".", ",") for value in page[column].to_numpy()])
+        yield list(zip(*formatted))
+
+def _load_renderer():
+    """
+    Imports the PDF stack and starts the persistent Kaleido renderer.
+    """
+    import jinja2
+    import weasyprint
+    import plotly.io as pio
+
+    _get_template(DEFAULT_TEMPLATE_PATH)
+
+    try:
+        import kaleido
+        # Kaleido >= 1.0 keeps one browser process for all sync renders
+        if hasattr(kaleido, 'start_sync_server'):
+            kaleido.start_sync_server(silence_warnings=True)
+    except ImportError:
+        pass
+
+def _warmup_worker():
+    try:
+        _load_renderer()
+    except Exception:
+        # Errors are reported by generate_pdf_report, warmup is best effort only
+        pass
+
+def warmup_renderer():
+    """
+    Starts loading the PDF stack in a background thread (once per process).
+    Returns the warmup thread.
+    """
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=_warmup_worker, name="pdf-renderer-warmup", daemon=True)
+            _warmup_thread.start()
+    return _warmup_thread
+
+def generate_pdf_report(financials, energy_balance, investment_data, input_params, figures_dict, dataframes_dict, template_path=DEFAULT_TEMPLATE_PATH,
+                        chart_format="png", appendix_df=None, appendix_columns=None, appendix_rows_per_page=50):
     """
     Generates a PDF report from the provided data and figures.
     
@@ -17,21 +121,25 @@ def generate_pdf_report(financials, energy_balance, investment_data, input_param
         figures_dict (dict): Dictionary of Plotly figures.
         dataframes_dict (dict): Dictionary of pandas DataFrames.
         template_path (str): Path to the directory containing templates.
+        chart_format (str): 'png' (rasterized) or 'svg' (vector, much smaller PDF).
+        appendix_df (pd.DataFrame): Optional interval data appended as a full table.
+        appendix_columns (dict): Column -> header mapping of the appendix (default: all columns).
+        appendix_rows_per_page (int): Rows of the appendix table per page.
         
     Returns:
         bytes: The generated PDF content.
     """
+    # Wait for a running warmup instead of loading the stack twice
+    if _warmup_thread is not None:
+        _warmup_thread.join()
+
+    from weasyprint import HTML
+
+    if chart_format not in ("png", "svg"):
+        raise ValueError(f"Unsupported chart format '{chart_format}', expected 'png' or 'svg'.")
     
-    # 1. Convert Figures to Base64 Images
-    images_b64 = {}
-    for name, fig in figures_dict.items():
-        # Update layout for print (white background)
-        fig.update_layout(template="plotly_white")
-        # Convert to static image (png)
-        img_bytes = pio.to_image(fig, format="png", width=800, height=500, scale=2)
-        # Encode to base64
-        img_b64 = base64.b64encode(img_bytes).decode('utf-8')
-        images_b64[name] = img_b64
+    # 1. Render Figures (base64 PNG or inline SVG)
+    images = {name: _render_chart(fig, chart_format) for name, fig in figures_dict.items()}
         
     # 2. Convert DataFrames to HTML
     tables_html = {}
@@ -60,23 +168,34 @@ def generate_pdf_report(financials, energy_balance, investment_data, input_param
         "final_sp500_net": f"{investment_data['final_sp500_net']:,.0f} Kč".replace(",", " "),
         
         # Images
-        "chart_savings_pie": images_b64.get('savings_pie', ''),
-        "chart_savings_treemap": images_b64.get('savings_treemap', ''),
-        "chart_energy_pie": images_b64.get('energy_pie', ''),
-        "chart_energy_treemap": images_b64.get('energy_treemap', ''),
-        "chart_monthly_stats": images_b64.get('monthly_stats', ''),
-        "chart_daily": images_b64.get('daily_chart', ''),
-        "chart_investment": images_b64.get('investment_chart', ''),
+        "chart_savings_pie": images.get('savings_pie', ''),
+        "chart_savings_treemap": images.get('savings_treemap', ''),
+        "chart_energy_pie": images.get('energy_pie', ''),
+        "chart_energy_treemap": images.get('energy_treemap', ''),
+        "chart_monthly_stats": images.get('monthly_stats', ''),
+        "chart_daily": images.get('daily_chart', ''),
+        "chart_investment": images.get('investment_chart', ''),
         
         # Tables
         "table_energy_data": tables_html.get('energy_data', ''),
-        "table_investment_data": tables_html.get('investment_data', '')
+        "table_investment_data": tables_html.get('investment_data', ''),
+        "table_weather_ensemble": tables_html.get('weather_ensemble', ''),
+
+        "chart_format": chart_format,
+        "appendix_headers": [],
+        "appendix_pages": []
     }
+
+    # Full interval appendix, formatted lazily page by page while rendering
+    if appendix_df is not None:
+        if appendix_columns is None:
+            appendix_columns = {column: column for column in appendix_df.columns}
+        context["appendix_headers"] = list(appendix_columns.values())
+        context["appendix_pages"] = _iter_appendix_pages(appendix_df, list(appendix_columns), appendix_rows_per_page)
     
     # 4. Render HTML Template
-    env = Environment(loader=FileSystemLoader(template_path))
-    template = env.get_template("report.html")
-    html_content = template.render(context)
+    template = _get_template(template_path)
+    html_content = "".join(template.generate(context))
     
     # 5. Convert to PDF
     pdf_bytes = HTML(string=html_content).write_pdf()
@@ -0,0 +1,190 @@
+import time
+import numpy as np
+import pandas as pd
+from analyzer import _dispatch_battery, calculate_energy_balance, calculate_financials
+
+# Energy flow columns that are re-expanded to annual totals
+FLOW_COLUMNS = ['consumption_kWh', 'production_kWh', 'grid_import_kWh', 'grid_export_kWh',
+                'battery_charge_kWh', 'battery_discharge_kWh']
+
+def _day_matrix(values, intervals_per_day):
+    return np.asarray(values, dtype=float).reshape(-1, intervals_per_day)
+
+def _kmeans(features, k, n_iter=100, seed=0):
+    """
+    Plain k-means with k-means++ initialization, returns the cluster label of every row.
+    """
+    rng = np.random.default_rng(seed)
+    n_rows = len(features)
+
+    centers = [features[rng.integers(n_rows)]]
+    for _ in range(1, k):
+        distances = np.min([((features - center) ** 2).sum(axis=1) for center in centers], axis=0)
+        probabilities = distances / distances.sum() if distances.sum() > 0 else np.full(n_rows, 1.0 / n_rows)
+        centers.append(features[rng.choice(n_rows, p=probabilities)])
+    centers = np.array(centers)
+
+    labels = None
+    for _ in range(n_iter):
+        distances = ((features[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        new_labels = distances.argmin(axis=1)
+        if labels is not None and np.array_equal(labels, new_labels):
+            break
+        labels = new_labels
+        for cluster in range(k):
+            members = features[labels == cluster]
+            if len(members):
+                centers[cluster] = members.mean(axis=0)
+    return labels
+
+def select_representative_days(consumption_df, production_df, n_days=12, price_profile=None, seed=0):
+    """
+    Clusters the daily (consumption, production, price) profiles into n_days representative days.
+
+    Every cluster is represented by its most typical real day (closest to the cluster centre),
+    scaled so that the cluster keeps its mean daily consumption and production.
+
+    Args:
+        consumption_df (pd.DataFrame): Consumption profile ('datetime', 'consumption_kWh').
+        production_df (pd.DataFrame): Production profile ('datetime', 'production_kWh').
+        n_days (int): Number of representative days (clusters).
+        price_profile (array): Optional price per interval, used only for clustering.
+        seed (int): Seed of the k-means initialization.
+
+    Returns:
+        dict: 'consumption' and 'production' (n_days x intervals per day) profiles, 'weights'
+              (number of days represented), 'dates' of the representative days and 'datetimes'
+              of one day on the original time axis.
+    """
+    df = pd.merge(consumption_df, production_df, on='datetime')
+    datetimes = pd.DatetimeIndex(df['datetime'])
+
+    intervals_per_day = int((datetimes.normalize() == datetimes.normalize()[0]).sum())
+    if datetimes[0] != datetimes[0].normalize() or len(df) % intervals_per_day != 0:
+        raise ValueError("Representative days require whole days starting at midnight.")
+
+    consumption = _day_matrix(df['consumption_kWh'], intervals_per_day)
+    production = _day_matrix(df['production_kWh'], intervals_per_day)
+    n_days = min(n_days, len(consumption))
+
+    # Every profile block is normalized so that all of them weigh the same in the clustering
+    blocks = [consumption, production]
+    if price_profile is not None:
+        blocks.append(_day_matrix(price_profile, intervals_per_day))
+    features = np.hstack([block / (block.std() or 1.0) for block in blocks])
+
+    labels = _kmeans(features, n_days, seed=seed)
+
+    rep_consumption, rep_production, weights, dates = [], [], [], []
+    for cluster in np.unique(labels):
+        members = np.nonzero(labels == cluster)[0]
+        centre = features[members].mean(axis=0)
+        medoid = members[((features[members] - centre) ** 2).sum(axis=1).argmin()]
+
+        for profile, output in ((consumption, rep_consumption), (production, rep_production)):
+            day = profile[medoid]
+            mean_total = profile[members].sum(axis=1).mean()
+            output.append(day * (mean_total / day.sum()) if day.sum() > 0 else np.full_like(day, mean_total / len(day)))
+
+        weights.append(len(members))
+        dates.append(datetimes[medoid * intervals_per_day].date())
+
+    return {
+        'consumption': np.array(rep_consumption),
+        'production': np.array(rep_production),
+        'weights': np.array(weights, dtype=float),
+        'dates': dates,
+        'datetimes': datetimes[:intervals_per_day]
+    }
+
+def simulate_representative_days(days, battery_capacity_kwh=10.0, flexible_loads=None):
+    """
+    Runs the dispatch on the representative days and re-expands the flows to a full year.
+
+    All representative days are dispatched at once as rows of one matrix. Every day is
+    simulated three times in a row and the middle day is kept, so the battery starts with
+    the state of charge it would carry over from a similar day instead of being empty, and
+    flexible load windows crossing midnight are not cut off at the end of the kept day.
+
+    Returns:
+        pd.DataFrame: Intervals of the representative days with flows multiplied by the day
+                      weights, so column sums (and calculate_financials) give annual totals.
+    """
+    intervals_per_day = days['consumption'].shape[1]
+    consumption = np.tile(days['consumption'], 3)
+    production = np.tile(days['production'], 3)
+
+    # Three consecutive days on the original time axis, for the time windows of flexible loads
+    datetimes = days['datetimes'].append([days['datetimes'] + pd.Timedelta(days=offset) for offset in (1, 2)])
+    flows = _dispatch_battery(consumption, production, battery_capacity_kwh,
+                              flexible_loads=flexible_loads, datetimes=datetimes)
+
+    weights = np.repeat(days['weights'], intervals_per_day)
+    columns = {
+        'date': np.repeat(days['dates'], intervals_per_day),
+        'weight': weights,
+        'datetime': np.tile(days['datetimes'], len(days['weights'])),
+        'consumption_kWh': days['consumption'].ravel() * weights,
+        'production_kWh': days['production'].ravel() * weights
+    }
+    for column, values in flows.items():
+        middle_day = values[:, intervals_per_day:2 * intervals_per_day].ravel()
+        # State of charge is a level, not an energy flow - it is not weighted
+        columns[column] = middle_day if column == 'battery_soc_kWh' else middle_day * weights
+
+    return pd.DataFrame(columns)
+
+def calculate_energy_balance_representative(consumption_df, production_df, battery_capacity_kwh=10.0,
+                                            n_days=12, flexible_loads=None, price_profile=None):
+    """
+    Approximate calculate_energy_balance on n_days representative days (see select_representative_days).
+    """
+    days = select_representative_days(consumption_df, production_df, n_days=n_days, price_profile=price_profile)
+    return simulate_representative_days(days, battery_capacity_kwh, flexible_loads)
+
+def compare_with_full_year(consumption_df, production_df, battery_capacity_kwh=10.0, n_days=12,
+                           flexible_loads=None, price_profile=None,
+                           electricity_price_buy=5.0, electricity_price_sell=2.0):
+    """
+    Reports the approximation error of the representative-day mode against a full-year run.
+
+    Returns:
+        dict: 'errors' DataFrame (metric, full year, approximation, absolute and relative error),
+              the run times of the full year, the clustering and the representative-day dispatch,
+              and the speedup of the dispatch.
+    """
+    start = time.perf_counter()
+    full_df = calculate_energy_balance(consumption_df, production_df, battery_capacity_kwh, flexible_loads=flexible_loads)
+    full_seconds = time.perf_counter() - start
+
+    # Clustering is done once per sweep, so it is timed separately from the dispatch
+    start = time.perf_counter()
+    days = select_representative_days(consumption_df, production_df, n_days=n_days, price_profile=price_profile)
+    clustering_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    approx_df = simulate_representative_days(days, battery_capacity_kwh, flexible_loads)
+    approx_seconds = time.perf_counter() - start
+
+    rows = []
+    columns = FLOW_COLUMNS + (['flexible_load_kWh'] if flexible_loads else [])
+    for column in columns:
+        rows.append((column, full_df[column].sum(), approx_df[column].sum()))
+
+    full_financials = calculate_financials(full_df, electricity_price_buy, electricity_price_sell)
+    approx_financials = calculate_financials(approx_df, electricity_price_buy, electricity_price_sell)
+    rows.append(('savings_czk', full_financials['savings_czk'], approx_financials['savings_czk']))
+
+    errors = pd.DataFrame(rows, columns=['metric', 'full_year', 'representative_days'])
+    errors['abs_error'] = errors['representative_days'] - errors['full_year']
+    errors['rel_error_pct'] = np.where(errors['full_year'] != 0,
+                                       errors['abs_error'] / errors['full_year'].where(errors['full_year'] != 0, 1) * 100,
+                                       0.0)
+
+    return {
+        'errors': errors,
+        'full_seconds': full_seconds,
+        'clustering_seconds': clustering_seconds,
+        'representative_seconds': approx_seconds,
+        'speedup': full_seconds / approx_seconds if approx_seconds > 0 else np.inf
+    }
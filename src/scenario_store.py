@@ -0,0 +1,148 @@
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import pandas as pd
+
+# Default location of the store (data/scenarios in the repository), can be changed with FVE_SCENARIO_DIR
+DEFAULT_SCENARIO_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "scenarios")
+
+# Maximum number of scenarios shown side by side
+MAX_COMPARED_SCENARIOS = 10
+
+def hash_inputs(inputs):
+    """
+    Returns a stable hash of an input set, identical inputs give identical hashes.
+    """
+    payload = json.dumps(inputs, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ScenarioStore:
+    """
+    Local store of saved analyses.
+
+    Metadata (name, inputs, metrics) is kept in SQLite, interval results in Parquet files.
+    Results are stored once per input hash, so scenarios with identical inputs share them.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or os.environ.get("FVE_SCENARIO_DIR", DEFAULT_SCENARIO_DIR)
+        self.results_dir = os.path.join(self.root, "results")
+        os.makedirs(self.results_dir, exist_ok=True)
+        self.db_path = os.path.join(self.root, "scenarios.sqlite")
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scenarios (
+                    name TEXT PRIMARY KEY,
+                    created_at TEXT NOT NULL,
+                    input_hash TEXT NOT NULL,
+                    inputs TEXT NOT NULL,
+                    metrics TEXT NOT NULL,
+                    investment TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_scenarios_hash ON scenarios (input_hash)")
+            # Stores created before the investment inputs were saved
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(scenarios)")]
+            if 'investment' not in columns:
+                conn.execute("ALTER TABLE scenarios ADD COLUMN investment TEXT")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def _results_path(self, input_hash):
+        return os.path.join(self.results_dir, f"{input_hash}.parquet")
+
+    def _remove_unused_results(self, conn, input_hash):
+        """
+        Removes the results file of an input hash once no scenario refers to it.
+        """
+        still_used = conn.execute("SELECT 1 FROM scenarios WHERE input_hash = ? LIMIT 1", (input_hash,)).fetchone()
+        if not still_used and os.path.exists(self._results_path(input_hash)):
+            os.remove(self._results_path(input_hash))
+
+    def save(self, name, inputs, result_df, metrics, investment=None):
+        """
+        Saves a scenario under a name (an existing scenario with the same name is replaced).
+
+        Args:
+            name (str): Scenario name.
+            inputs (dict): Inputs of the energy balance, identical inputs share stored results.
+            result_df (pd.DataFrame): Result of calculate_energy_balance.
+            metrics (dict): Annual metrics of the scenario.
+            investment (dict): Inputs of the investment comparison (cost, horizon, returns).
+        """
+        input_hash = hash_inputs(inputs)
+        results_path = self._results_path(input_hash)
+        if not os.path.exists(results_path):
+            result_df.to_parquet(results_path, index=False)
+
+        with self._connect() as conn:
+            replaced = conn.execute("SELECT input_hash FROM scenarios WHERE name = ?", (name,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO scenarios (name, created_at, input_hash, inputs, metrics, investment) VALUES (?, ?, ?, ?, ?, ?)",
+                (name, datetime.datetime.now().isoformat(timespec='seconds'), input_hash,
+                 json.dumps(inputs, default=str, ensure_ascii=False),
+                 json.dumps({key: float(value) for key, value in metrics.items()}),
+                 json.dumps(investment) if investment is not None else None)
+            )
+            if replaced and replaced[0] != input_hash:
+                self._remove_unused_results(conn, replaced[0])
+        return input_hash
+
+    def list_scenarios(self):
+        """
+        Returns all saved scenarios (name, created_at, inputs, metrics and investment inputs), newest first.
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT name, created_at, inputs, metrics, investment FROM scenarios ORDER BY created_at DESC").fetchall()
+        return pd.DataFrame([
+            {'name': name, 'created_at': created_at, 'inputs': json.loads(inputs), 'metrics': json.loads(metrics),
+             'investment': json.loads(investment) if investment else None}
+            for name, created_at, inputs, metrics, investment in rows
+        ], columns=['name', 'created_at', 'inputs', 'metrics', 'investment'])
+
+    def _load_row(self, row):
+        name, inputs, metrics, investment, input_hash = row
+        results_path = self._results_path(input_hash)
+        if not os.path.exists(results_path):
+            return None
+        return {
+            'name': name,
+            'inputs': json.loads(inputs),
+            'metrics': json.loads(metrics),
+            'investment': json.loads(investment) if investment else None,
+            'result_df': pd.read_parquet(results_path)
+        }
+
+    def load(self, name):
+        """
+        Loads a scenario by name, returns None if it does not exist.
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT name, inputs, metrics, investment, input_hash FROM scenarios WHERE name = ?", (name,)).fetchone()
+        return self._load_row(row) if row else None
+
+    def find_by_inputs(self, inputs):
+        """
+        Returns the most recent scenario computed with identical inputs, or None.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT name, inputs, metrics, investment, input_hash FROM scenarios WHERE input_hash = ? ORDER BY created_at DESC LIMIT 1",
+                (hash_inputs(inputs),)
+            ).fetchone()
+        return self._load_row(row) if row else None
+
+    def delete(self, name):
+        """
+        Deletes a scenario, its results are removed when no other scenario uses them.
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT input_hash FROM scenarios WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                return
+            conn.execute("DELETE FROM scenarios WHERE name = ?", (name,))
+            self._remove_unused_results(conn, row[0])
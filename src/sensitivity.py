@@ -0,0 +1,257 @@
+import os
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from analyzer import calculate_energy_balance, calculate_financials, calculate_investment_comparison
+from representative_days import select_representative_days, simulate_representative_days
+
+# Inputs of the sensitivity analysis.
+# Only 'kwp' and 'battery_capacity' need a new energy balance, the others reuse cached energy flows.
+SENSITIVITY_PARAMETERS = {
+    'price_power': {'label': 'Cena silové elektřiny'},
+    'price_distribution': {'label': 'Cena distribuce'},
+    'price_sell': {'label': 'Výkupní cena'},
+    'inflation_pct': {'label': 'Inflace / Růst cen energie'},
+    'sp500_return_pct': {'label': 'Výnos S&P 500'},
+    'investment_cost': {'label': 'Pořizovací cena FVE'},
+    'kwp': {'label': 'Výkon FVE'},
+    'battery_capacity': {'label': 'Kapacita baterie'}
+}
+
+# Results that can be analyzed
+SENSITIVITY_METRICS = {
+    'savings_czk': 'Roční úspora (Kč)',
+    'payback_years': 'Návratnost (roky)',
+    'final_pv_gain_czk': 'Zisk FVE na konci horizontu (Kč)',
+    'pv_vs_sp500_czk': 'FVE + Reinvestice vs. S&P 500 (Kč)'
+}
+
+def payback_period(inv_df):
+    """
+    Returns the payback period in years, interpolated between the yearly values.
+    Returns NaN if the investment does not pay back within the horizon.
+    """
+    years = inv_df['Year'].to_numpy()
+    cash_flow = inv_df['PV_Cumulative_CashFlow'].to_numpy()
+
+    positive = np.nonzero(cash_flow >= 0)[0]
+    if len(positive) == 0:
+        return np.nan
+    i = positive[0]
+    if i == 0:
+        return float(years[0])
+    # Linear interpolation within the year of the crossing
+    return years[i - 1] + (-cash_flow[i - 1]) / (cash_flow[i] - cash_flow[i - 1])
+
+def perturb(base_value, change_pct, reference_value=0.0):
+    """
+    Returns a value changed by change_pct, never below zero.
+    A zero base (e.g. no battery) is changed additively by change_pct of the reference value,
+    so that it is actually varied.
+    """
+    if base_value == 0:
+        value = reference_value * change_pct / 100
+    else:
+        value = base_value * (1 + change_pct / 100)
+    return max(value, 0.0)
+
+def _simulate(consumption_df, production_df, base_kwp, kwp, battery_capacity, flexible_loads):
+    """
+    Runs the energy balance for one PV size and battery capacity (executed in the process pool).
+    Production is scaled linearly from the base PV size, so the weather stays the same.
+    """
+    scaled_production = production_df.copy()
+    scaled_production['production_kWh'] = production_df['production_kWh'] * (kwp / base_kwp)
+    return calculate_energy_balance(consumption_df, scaled_production, battery_capacity_kwh=battery_capacity,
+                                    flexible_loads=flexible_loads)
+
+def _simulate_representative(days, base_kwp, kwp, battery_capacity, flexible_loads):
+    """
+    Approximate energy balance on the representative days of the base case.
+    """
+    scaled_days = {**days, 'production': days['production'] * (kwp / base_kwp)}
+    return simulate_representative_days(scaled_days, battery_capacity_kwh=battery_capacity, flexible_loads=flexible_loads)
+
+def _evaluate(case, result_df, years):
+    """
+    Computes the sensitivity metrics of one case from its energy flows.
+    """
+    price_buy = case['price_power'] + case['price_distribution']
+    financials = calculate_financials(result_df, electricity_price_buy=price_buy, electricity_price_sell=case['price_sell'])
+
+    inv_df = calculate_investment_comparison(
+        initial_investment_czk=case['investment_cost'],
+        annual_savings_czk=financials['savings_czk'],
+        years=years,
+        sp500_return_pct=case['sp500_return_pct'],
+        inflation_pct=case['inflation_pct']
+    )
+
+    return {
+        'savings_czk': financials['savings_czk'],
+        'payback_years': payback_period(inv_df),
+        'final_pv_gain_czk': inv_df['PV_Cumulative_CashFlow'].iloc[-1],
+        'pv_vs_sp500_czk': inv_df['PV_Reinvest_Net_Result'].iloc[-1] - inv_df['SP500_Net_Result'].iloc[-1]
+    }
+
+class SensitivityEngine:
+    """
+    Evaluates perturbations of the base case.
+
+    Energy flows are cached per (kWp, battery) pair, so price and investment
+    perturbations only recompute the financials. The remaining energy balances
+    are simulated in parallel across a process pool.
+    """
+
+    def __init__(self, consumption_df, production_df, base_case, years=20, flexible_loads=None, max_workers=None,
+                 n_representative_days=None, reference_case=None):
+        """
+        Args:
+            consumption_df (pd.DataFrame): Consumption profile of the base case.
+            production_df (pd.DataFrame): Production profile for base_case['kwp'].
+            base_case (dict): Values of all SENSITIVITY_PARAMETERS.
+            years (int): Investment horizon.
+            flexible_loads (list): Flexible loads of the base case.
+            max_workers (int): Size of the process pool (default: number of CPUs).
+            n_representative_days (int): If set, energy balances are approximated on this number
+                                         of representative days instead of the full year.
+            reference_case (dict): Typical values of the parameters, relative steps of a parameter
+                                   with a zero base are taken from them (e.g. the input defaults).
+        """
+        missing = set(SENSITIVITY_PARAMETERS) - set(base_case)
+        if missing:
+            raise ValueError(f"Base case is missing parameters: {sorted(missing)}")
+
+        self.consumption_df = consumption_df
+        self.production_df = production_df
+        self.base_case = dict(base_case)
+        self.reference_case = dict(reference_case or {})
+        self.years = years
+        self.flexible_loads = flexible_loads
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._flows = {}
+
+        # Representative days are selected once for the base case and reused for every simulation
+        self.representative_days = None
+        if n_representative_days:
+            self.representative_days = select_representative_days(consumption_df, production_df, n_days=n_representative_days)
+
+    def _perturb(self, param, change_pct):
+        return perturb(self.base_case[param], change_pct, self.reference_case.get(param, 0.0))
+
+    def _flow_key(self, case):
+        return (round(case['kwp'], 6), round(case['battery_capacity'], 6))
+
+    def _simulate_missing(self, cases):
+        """
+        Simulates the energy flows that are not cached yet, in parallel if there are several.
+        """
+        missing = []
+        for case in cases:
+            key = self._flow_key(case)
+            if key not in self._flows and key not in missing:
+                missing.append(key)
+        if not missing:
+            return
+
+        if self.representative_days is not None:
+            # Approximate runs take milliseconds, a process pool would only add overhead
+            for kwp, battery in missing:
+                self._flows[(kwp, battery)] = _simulate_representative(
+                    self.representative_days, self.base_case['kwp'], kwp, battery, self.flexible_loads)
+            return
+
+        args = [(self.consumption_df, self.production_df, self.base_case['kwp'], kwp, battery, self.flexible_loads)
+                for kwp, battery in missing]
+
+        if len(missing) == 1 or self.max_workers == 1:
+            results = [_simulate(*arg) for arg in args]
+        else:
+            # Workers are spawned, forking the multi-threaded Streamlit server can deadlock
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(missing)),
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                results = list(executor.map(_simulate, *zip(*args)))
+
+        for key, result_df in zip(missing, results):
+            self._flows[key] = result_df
+
+    def evaluate(self, overrides):
+        """
+        Evaluates a list of cases given as parameter overrides of the base case.
+        Returns a DataFrame with the case parameters and all SENSITIVITY_METRICS.
+        """
+        cases = [{**self.base_case, **override} for override in overrides]
+        self._simulate_missing(cases)
+
+        rows = []
+        for case in cases:
+            metrics = _evaluate(case, self._flows[self._flow_key(case)], self.years)
+            rows.append({**case, **metrics})
+        return pd.DataFrame(rows)
+
+    def tornado(self, metric='savings_czk', variation_pct=20.0, parameters=None):
+        """
+        Varies every parameter by -/+ variation_pct and returns the low/high values of the metric,
+        sorted by the swing (largest impact first).
+        """
+        parameters = parameters or list(SENSITIVITY_PARAMETERS)
+        overrides = [{}]
+        for param in parameters:
+            for sign in (-1, 1):
+                overrides.append({param: self._perturb(param, sign * variation_pct)})
+
+        results = self.evaluate(overrides)
+        base_value = results[metric].iloc[0]
+
+        rows = []
+        for i, param in enumerate(parameters):
+            low = results[metric].iloc[1 + 2 * i]
+            high = results[metric].iloc[2 + 2 * i]
+            rows.append({
+                'parameter': param,
+                'label': SENSITIVITY_PARAMETERS[param]['label'],
+                'base_value': base_value,
+                'low_value': low,
+                'high_value': high,
+                'swing': abs(high - low)
+            })
+
+        return pd.DataFrame(rows).sort_values('swing', ascending=False, na_position='last').reset_index(drop=True)
+
+    def spider(self, metric='savings_czk', steps_pct=(-30, -20, -10, 0, 10, 20, 30), parameters=None):
+        """
+        Varies every parameter over the relative steps and returns the metric for each step (long format).
+        """
+        parameters = parameters or list(SENSITIVITY_PARAMETERS)
+        combinations = [(param, step) for param in parameters for step in steps_pct]
+        overrides = [{param: self._perturb(param, step)} for param, step in combinations]
+
+        results = self.evaluate(overrides)
+        return pd.DataFrame({
+            'parameter': [param for param, _ in combinations],
+            'label': [SENSITIVITY_PARAMETERS[param]['label'] for param, _ in combinations],
+            'change_pct': [step for _, step in combinations],
+            'value': results[metric].to_numpy()
+        })
+
+    def two_way_table(self, param_x, param_y, metric='savings_czk', steps_pct=(-20, -10, 0, 10, 20)):
+        """
+        Varies two parameters together and returns the metric as a table
+        (rows = change of param_y in %, columns = change of param_x in %).
+        """
+        combinations = list(itertools.product(steps_pct, steps_pct))
+        overrides = [{param_x: self._perturb(param_x, step_x),
+                      param_y: self._perturb(param_y, step_y)}
+                     for step_x, step_y in combinations]
+
+        results = self.evaluate(overrides)
+        table = pd.DataFrame({
+            'x': [step_x for step_x, _ in combinations],
+            'y': [step_y for _, step_y in combinations],
+            'value': results[metric].to_numpy()
+        }).pivot(index='y', columns='x', values='value')
+        table.index.name = f"{SENSITIVITY_PARAMETERS[param_y]['label']} (%)"
+        table.columns.name = f"{SENSITIVITY_PARAMETERS[param_x]['label']} (%)"
+        return table
@@ -1,6 +1,19 @@
 import plotly.graph_objects as go
-import plotly.express as px
 import pandas as pd
+from analyzer import FLEXIBLE_LOAD_PRESETS
+
+# Colors of the flexible load categories in treemaps
+FLEXIBLE_LOAD_COLORS = {'water_heater': 'purple', 'heat_pump': 'teal', 'ev': 'gold'}
+
+def _flexible_load_ids(df):
+    """
+    Returns ids of the flexible loads present in the result columns.
+    """
+    return [column[len('flex_'):-len('_solar_kWh')] for column in df.columns
+            if column.startswith('flex_') and column.endswith('_solar_kWh')]
+
+def _flexible_load_label(load_id):
+    return FLEXIBLE_LOAD_PRESETS.get(load_id, {}).get('label', load_id)
 
 def plot_energy_balance_daily(df, date):
     """
@@ -13,6 +26,8 @@ def plot_energy_balance_daily(df, date):
     fig.add_trace(go.Scatter(x=daily_df['datetime'], y=daily_df['consumption_kWh'], name='Spotřeba', line=dict(color='red')))
     fig.add_trace(go.Scatter(x=daily_df['datetime'], y=daily_df['production_kWh'], name='Výroba FVE', line=dict(color='green')))
     fig.add_trace(go.Scatter(x=daily_df['datetime'], y=daily_df['battery_soc_kWh'], name='Stav Baterie', line=dict(color='blue', dash='dot')))
+    if 'flexible_load_kWh' in daily_df:
+        fig.add_trace(go.Scatter(x=daily_df['datetime'], y=daily_df['flexible_load_kWh'], name='Řízené spotřebiče', line=dict(color='purple', dash='dash')))
     
     fig.update_layout(title=f'Energetická Bilance - {date}', xaxis_title='Čas', yaxis_title='kWh')
     return fig
@@ -21,8 +36,9 @@ def plot_monthly_stats(df):
     """
     Plots monthly aggregation of import/export/production/consumption.
     """
-    df['month'] = df['datetime'].dt.month_name()
-    monthly = df.groupby('month')[['consumption_kWh', 'production_kWh', 'grid_import_kWh', 'grid_export_kWh']].sum().reset_index()
+    # Grouped by a local Series, the caller's DataFrame is not modified
+    month = df['datetime'].dt.month_name().rename('month')
+    monthly = df.groupby(month)[['consumption_kWh', 'production_kWh', 'grid_import_kWh', 'grid_export_kWh']].sum().reset_index()
     
     # Sort by month index to ensure correct order
     # This is a quick hack, better to use categorical type
@@ -92,6 +108,9 @@ def plot_energy_treemap(result_df):
     """
     Plots a treemap showing the composition of energy (Self-consumption vs Export) by Month.
     """
+    # Plotly Express is slow to import, only the treemaps need it
+    import plotly.express as px
+
     # Resample to monthly sums
     monthly_df = result_df.resample('ME', on='datetime').sum()
     monthly_df['Month_En'] = monthly_df.index.strftime('%B')
@@ -105,9 +124,15 @@ def plot_energy_treemap(result_df):
     monthly_df['Month'] = monthly_df['Month_En'].map(czech_months)
     
     # Calculate monthly values
-    monthly_self_consumption_kwh = monthly_df['production_kWh'] - monthly_df['grid_export_kWh']
+    load_ids = _flexible_load_ids(result_df)
+    monthly_diverted_kwh = {load_id: monthly_df[f'flex_{load_id}_solar_kWh'] for load_id in load_ids}
+    monthly_self_consumption_kwh = monthly_df['production_kWh'] - monthly_df['grid_export_kWh'] - sum(monthly_diverted_kwh.values())
     monthly_export_kwh = monthly_df['grid_export_kWh']
     
+    color_map = {'Vlastní spotřeba': 'blue', 'Export do sítě': 'cyan'}
+    for load_id in load_ids:
+        color_map[f'{_flexible_load_label(load_id)} (přebytky)'] = FLEXIBLE_LOAD_COLORS.get(load_id, 'gray')
+    
     # Prepare data for Treemap
     data = []
     
@@ -118,6 +143,13 @@ def plot_energy_treemap(result_df):
             'Month': month,
             'Value': monthly_self_consumption_kwh.iloc[i]
         })
+        # Surplus diverted to flexible loads
+        for load_id, diverted in monthly_diverted_kwh.items():
+            data.append({
+                'Category': f'{_flexible_load_label(load_id)} (přebytky)',
+                'Month': month,
+                'Value': diverted.iloc[i]
+            })
         # Export item
         data.append({
             'Category': 'Export do sítě',
@@ -133,7 +165,7 @@ def plot_energy_treemap(result_df):
     # Treemap with Month -> Category hierarchy
     fig = px.treemap(df_treemap, path=['Month', 'Category'], values='Value',
                      color='Category',
-                     color_discrete_map={'Vlastní spotřeba': 'blue', 'Export do sítě': 'cyan'})
+                     color_discrete_map=color_map)
     
     fig.update_layout(title='Energetická Bilance (Treemap - kWh)')
     return fig
@@ -142,6 +174,9 @@ def plot_savings_treemap(result_df, price_buy, price_sell):
     """
     Plots a treemap showing the composition of total savings by Month and Category.
     """
+    # Plotly Express is slow to import, only the treemaps need it
+    import plotly.express as px
+
     # Resample to monthly sums
     monthly_df = result_df.resample('ME', on='datetime').sum()
     monthly_df['Month_En'] = monthly_df.index.strftime('%B')
@@ -155,12 +190,19 @@ def plot_savings_treemap(result_df, price_buy, price_sell):
     monthly_df['Month'] = monthly_df['Month_En'].map(czech_months)
     
     # Calculate monthly values
-    monthly_self_consumption_kwh = monthly_df['production_kWh'] - monthly_df['grid_export_kWh']
+    load_ids = _flexible_load_ids(result_df)
+    monthly_diverted_kwh = {load_id: monthly_df[f'flex_{load_id}_solar_kWh'] for load_id in load_ids}
+    monthly_self_consumption_kwh = monthly_df['production_kWh'] - monthly_df['grid_export_kWh'] - sum(monthly_diverted_kwh.values())
     
     # Calculate financial values
     savings_self_consumption_czk = monthly_self_consumption_kwh * price_buy
+    savings_diverted_czk = {load_id: diverted * price_buy for load_id, diverted in monthly_diverted_kwh.items()}
     revenue_export_czk = monthly_df['grid_export_kWh'] * price_sell
     
+    color_map = {'Úspora vlastní spotřebou': 'green', 'Příjem z prodeje': 'orange'}
+    for load_id in load_ids:
+        color_map[f'Úspora - {_flexible_load_label(load_id)}'] = FLEXIBLE_LOAD_COLORS.get(load_id, 'gray')
+    
     # Prepare data for Treemap
     data = []
     
@@ -171,6 +213,13 @@ def plot_savings_treemap(result_df, price_buy, price_sell):
             'Month': month,
             'Value': savings_self_consumption_czk.iloc[i]
         })
+        # Surplus diverted to flexible loads (avoided purchase)
+        for load_id, savings in savings_diverted_czk.items():
+            data.append({
+                'Category': f'Úspora - {_flexible_load_label(load_id)}',
+                'Month': month,
+                'Value': savings.iloc[i]
+            })
         # Export item
         data.append({
             'Category': 'Příjem z prodeje',
@@ -186,8 +235,106 @@ def plot_savings_treemap(result_df, price_buy, price_sell):
     # Treemap with Month -> Category hierarchy
     fig = px.treemap(df_treemap, path=['Month', 'Category'], values='Value',
                      color='Category',
-                     color_discrete_map={'Úspora vlastní spotřebou': 'green', 'Příjem z prodeje': 'orange'})
+                     color_discrete_map=color_map)
     
     fig.update_layout(title='Složení Celkové Úspory (Treemap - Měsíce)')
     return fig
 
+
+def plot_tornado(tornado_df, metric_label):
+    """
+    Plots a tornado chart of the low/high metric values per parameter around the base case.
+    """
+    # Largest swing on top
+    df = tornado_df.iloc[::-1]
+    base_value = df['base_value'].iloc[0]
+    
+    fig = go.Figure()
+    fig.add_trace(go.Bar(y=df['label'], x=df['low_value'] - base_value, base=base_value, orientation='h',
+                         name='Snížení parametru', marker_color='indianred',
+                         customdata=df['low_value'], hovertemplate='%{y}: %{customdata:,.0f}<extra></extra>'))
+    fig.add_trace(go.Bar(y=df['label'], x=df['high_value'] - base_value, base=base_value, orientation='h',
+                         name='Zvýšení parametru', marker_color='seagreen',
+                         customdata=df['high_value'], hovertemplate='%{y}: %{customdata:,.0f}<extra></extra>'))
+    
+    fig.add_vline(x=base_value, line_dash="dot", line_color="gray")
+    
+    fig.update_layout(
+        title=f'Citlivostní analýza - {metric_label}',
+        xaxis_title=metric_label,
+        barmode='overlay',
+        legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5)
+    )
+    return fig
+
+def plot_spider(spider_df, metric_label):
+    """
+    Plots a spider chart: the metric as a function of the relative change of each parameter.
+    """
+    fig = go.Figure()
+    
+    for label, group in spider_df.groupby('label', sort=False):
+        fig.add_trace(go.Scatter(x=group['change_pct'], y=group['value'], name=label, mode='lines+markers'))
+    
+    fig.update_layout(
+        title=f'Spider graf - {metric_label}',
+        xaxis_title='Změna parametru (%)',
+        yaxis_title=metric_label,
+        hovermode='x unified'
+    )
+    return fig
+
+def plot_weather_ensemble(years_df, summary_df, metric='savings_czk'):
+    """
+    Plots the metric for every weather year with the P50/P90 levels.
+    """
+    row = summary_df[summary_df['metric'] == metric].iloc[0]
+    
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=years_df['year'].astype(str), y=years_df[metric], name=row['label'], marker_color='seagreen'))
+    
+    fig.add_hline(y=row['P50'], line_dash="dash", line_color="blue", annotation_text="P50")
+    fig.add_hline(y=row['P90'], line_dash="dot", line_color="red", annotation_text="P90")
+    
+    fig.update_layout(title=f'Víceletá simulace počasí - {row["label"]}', xaxis_title='Meteorologický rok', yaxis_title=row['label'])
+    return fig
+
+def plot_billing_monthly(monthly_df):
+    """
+    Plots monthly total costs of several billing products side by side.
+    """
+    fig = go.Figure()
+    for product in monthly_df.columns:
+        fig.add_trace(go.Bar(x=monthly_df.index, y=monthly_df[product], name=product))
+    
+    fig.update_layout(title='Měsíční náklady podle produktu', xaxis_title='Měsíc', yaxis_title='Kč', barmode='group')
+    return fig
+
+def plot_scenario_monthly(monthly_df, title, unit="kWh"):
+    """
+    Plots a monthly value of several saved scenarios side by side.
+    """
+    fig = go.Figure()
+    for scenario in monthly_df.columns:
+        fig.add_trace(go.Bar(x=monthly_df.index, y=monthly_df[scenario], name=scenario))
+
+    fig.update_layout(title=title, xaxis_title='Měsíc', yaxis_title=unit, barmode='group')
+    return fig
+
+def plot_scenario_investment(investment_curves):
+    """
+    Overlays the PV cumulative cash flow of several scenarios (scenario name -> investment DataFrame).
+    """
+    fig = go.Figure()
+    for scenario, df in investment_curves.items():
+        fig.add_trace(go.Scatter(x=df['Year'], y=df['PV_Cumulative_CashFlow'], name=scenario, line=dict(width=3)))
+
+    fig.add_hline(y=0, line_dash="dot", line_color="gray")
+    fig.update_layout(
+        title='FVE Kumulativní Cashflow podle scénáře',
+        xaxis_title='Rok',
+        yaxis_title='Hodnota (Kč)',
+        hovermode='x unified',
+        legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5)
+    )
+    return fig